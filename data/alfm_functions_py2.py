@@ -8,8 +8,65 @@ This file contains all required functions to run UI.
 
 '''
 
+import bisect
+import fnmatch
+import glob
+import gzip
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import re
+import shlex
+import struct
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from functools import partial
+from multiprocessing.pool import ThreadPool
+from collections import OrderedDict
 import hou
-from PySide2 import QtWidgets
+from PySide2 import QtCore, QtWidgets
+
+# Light Blocker geo transform parameters, exported alongside the Light Blocker Filter
+BLOCKER_TRANSFORM_PARMS = ("tx", "ty", "tz", "rx", "ry", "rz", "sx", "sy", "sz")
+
+# Light Blocker Filter matrix parameters driven by the Light Blocker geo transforms
+BLOCKER_MATRIX_PARMS = ("geometry_matrix1", "geometry_matrix2", "geometry_matrix3", "geometry_matrix5",
+                        "geometry_matrix6", "geometry_matrix7", "geometry_matrix9", "geometry_matrix10",
+                        "geometry_matrix11", "geometry_matrix13", "geometry_matrix14", "geometry_matrix15")
+
+# User data key of the stable Light Filter ID, stored on Light Filters, their Fetch nodes and Light Blocker geo
+FILTER_ID_KEY = "lfm_filter_id"
+
+# User data key marking Light Blocker Filters drawn as viewport guides instead of Light Blocker geo
+BLOCKER_GUIDE_KEY = "lfm_blocker_guide"
+
+# Viewer state drawing Light Blocker guides, and its transform handle
+BLOCKER_GUIDE_STATE = "lfm_blocker_guides"
+BLOCKER_GUIDE_HANDLE = "blocker_xform"
+
+# {Light Blocker geometry_type: (SOP verb, verb parameters)}, the shapes light_blocker_geo builds with SOP nodes
+BLOCKER_GUIDE_SHAPES = {"box": ("box", {}),
+                        "sphere": ("sphere", {"type": 2, "scale": 0.5, "rows": 16, "cols": 16}),
+                        "plane": ("grid", {"size": (1, 1), "r": (90, 0, 0), "rows": 2, "cols": 2}),
+                        "cylinder": ("tube", {"type": 1, "cap": 1, "rad": (0.5, 0.5), "cols": 20})}
+
+# Texture to .tx converter command used by the Gobo preflight, overridden by the ALFM_TX_COMMAND environment variable
+TX_COMMAND = "maketx -v -u --oiio {source} -o {target}"
+
+# Default render cost model in relative units: per Light Filter, per Light Filter type, per Light Blocker geometry
+# type, per megapixel of Gobo textures and per Gobo texture which can not be read.
+# Updated with the JSON files listed in the ALFM_COST_MODEL environment variable.
+COST_MODEL = {"filter": 1.0,
+              "types": {"arnold::barndoor": 0.5, "arnold::gobo": 2.0, "arnold::light_blocker": 1.0,
+                        "arnold::light_decay": 0.25},
+              "blocker_shapes": {"box": 1.0, "plane": 0.5, "sphere": 1.5, "cylinder": 1.5},
+              "gobo_megapixel": 0.5,
+              "missing_texture": 4.0}
 
 
 def accessible_filters(light_indexes, LIGHT_TYPES):
@@ -21,7 +78,7 @@ def accessible_filters(light_indexes, LIGHT_TYPES):
     """
     light_filters = []
     for index in light_indexes:
-        light_filters.append(list(LIGHT_TYPES[index]))
+        light_filters.append(list(LIGHT_TYPES.get(index, [])))
 
     if light_filters:
         common_filters = list(set.intersection(*map(set, tuple(light_filters))))
@@ -30,233 +87,2756 @@ def accessible_filters(light_indexes, LIGHT_TYPES):
         pass
 
 
-def active_list(ui_lights_list, ui_active_list, LIGHT_FILTERS):
+def supported_filters(light_indexes, LIGHT_TYPES):
     """
-    Generate Active Light Filters list based on lights selection.
-    :param ui_lights_list: lights_list widget
-    :param ui_active_list: active_list widget
-    :param LIGHT_FILTERS: LIGHT_FILTERS dictionary
-    :return: List of active list widget items
+    Union of light filters list based on Light Type of selected lights.
+    :param light_indexes: light type index
+    :param LIGHT_TYPES: Dictionary of LIGHT_TYPES
+    :return: List of light filters supported by at least one of the Light Types
     """
+    light_filters = set()
+    for index in light_indexes:
+        light_filters.update(LIGHT_TYPES.get(index, []))
 
-    selected_lights = ui_lights_list.selectedItems()
-
-    selected_filter_nodes = []
+    if light_indexes:
+        return list(light_filters)
+    else:
+        pass
 
-    for light in selected_lights:
-        selected_light_node = hou.node(light.text())
-        selected_asn_node = selected_light_node.node("shopnet/arnold_vopnet")
-        light_filters_nodes = selected_asn_node.allSubChildren()
-        for filter_name in light_filters_nodes:
-            if len(light_filters_nodes) == 1 and light_filters_nodes[0].type().name() == "arnold_light":
-                selected_filter_nodes.append(" ")
-            elif filter_name.type().name() == "arnold::fetch" or filter_name.type().name() in list(LIGHT_FILTERS):
-                selected_filter_nodes.append(filter_name)
-            else:
-                pass
 
-    filter_names = []
+def partition_lights(light_types, filter_type, LIGHT_TYPES):
+    """
+    Split Lights by whether their Light Type supports a Light Filter type.
+    :param light_types: List of (Light path, Light Type index) tuples
+    :param filter_type: Light Filter node type name
+    :param LIGHT_TYPES: Dictionary of LIGHT_TYPES
+    :return: Tuple of (supporting Light paths, skipped Light paths), both in the given order
+    """
 
-    for light_name in selected_filter_nodes:
-        if " " not in selected_filter_nodes:
-            filter_names.append(light_name.name())
+    light_paths = []
+    skipped_light_paths = []
+    for light_path, light_type in light_types:
+        if filter_type in LIGHT_TYPES.get(light_type, []):
+            light_paths.append(light_path)
         else:
-            pass
+            skipped_light_paths.append(light_path)
 
-    duplicate_filter_names = []
+    return light_paths, skipped_light_paths
 
-    ui_active_list.clear()
 
-    for filter_name in filter_names:
-        if len(selected_lights) == 1 and " " not in selected_filter_nodes:
-            ui_active_list.addItem(filter_name)
-        elif filter_names.count(filter_name) == len(
-                selected_lights) and filter_name not in duplicate_filter_names and " " not in selected_filter_nodes:
-            duplicate_filter_names.append(filter_name)
-        else:
-            pass
+def filter_panel_snapshot(light_paths, light_types, light_index, filters_asn, filter_types, mixed_types=False):
+    """
+    Capture Light and Light Filter data needed for the Filters panel, on the main thread, without changing any node.
+    The snapshot is plain Python data, safe to read from a background thread.
+    :param light_paths: List of selected Light paths
+    :param light_types: List of Light Type indexes of selected Lights
+    :param light_index: LightFilterIndex of all Lights
+    :param filters_asn: LFM_LIGHT_FILTERS_VOPNET node
+    :param filter_types: FilterRegistry of Light Filter types
+    :param mixed_types: offer Light Filter types supported by any selected Light instead of all of them
+    :return: Snapshot dictionary
+    """
 
-    for filter_name in duplicate_filter_names:
-        ui_active_list.addItem(filter_name)
+    filter_names = light_index.filter_names()
+    filters = []
+    for filter_node in light_filter_nodes(filters_asn, filter_types):
+        filter_id = stored_filter_id(filter_node)[0]
+        filter_names[filter_id] = filter_node.name()
+        filters.append((filter_id, filter_node.name(), filter_node.type().name()))
 
-    if len(selected_lights) == 1:
-        return filter_names
+    if light_paths and all(light_index.has_light(light_path) for light_path in light_paths):
+        selection_bits = light_index.lights_bitset(light_paths)
     else:
-        return duplicate_filter_names
+        selection_bits = 0
+
+    return {"light_types": list(set(light_types)),
+            "selection_bits": selection_bits,
+            "filter_bits": dict(light_index.filter_bits),
+            "filter_order": light_fetch_order(hou.node(light_paths[0])) if light_paths else [],
+            "filters": filters,
+            "filter_names": filter_names,
+            "mixed_types": mixed_types}
 
 
-def available_list(available_filters_list, common_filters, ui_available_list, ui_active_list):
+def compute_filter_panel(snapshot, LIGHT_TYPES, cancelled=None):
     """
-    Generate Available Light Filters list based on lights selection.
-    :param available_filters_list: Available filter nodes for selected lights
-    :param common_filters: Available light filters based on light type
-    :param ui_available_list: available_list widget
-    :param ui_active_list: active_list widget
-    :return: List of available list widget items
+    Compute Add Filter, Active and Available Light Filters lists from a snapshot, without touching any node.
+    :param snapshot: filter_panel_snapshot dictionary
+    :param LIGHT_TYPES: Dictionary of LIGHT_TYPES
+    :param cancelled: function returning True when the computation is stale
+    :return: Dictionary {"filter_types": sorted Light Filter types supported by all selected Lights (by any of them
+             with mixed_types) or None, "active": (name, ID) tuples in
+             OUT_light order of the first selected Light, "available": sorted (name, ID) tuples}, None when cancelled
     """
 
-    filter_names = []
+    common_filters = accessible_filters(snapshot["light_types"], LIGHT_TYPES)
+
+    filter_order = dict((filter_id, position) for position, filter_id in enumerate(snapshot["filter_order"]))
 
+    selection_bits = snapshot["selection_bits"]
+    active_filter_ids = set()
+    if selection_bits:
+        for position, (filter_id, filter_bits) in enumerate(snapshot["filter_bits"].items()):
+            if cancelled is not None and position % 1000 == 0 and cancelled():
+                return None
+            if filter_bits & selection_bits == selection_bits:
+                active_filter_ids.add(filter_id)
+
+    available_filters = []
     if common_filters is not None:
-        for filter_node in available_filters_list:
-            for filter_name in common_filters:
-                if filter_node.type().name() == filter_name:
-                    filter_names.append(filter_node.name())
-                else:
-                    pass
+        for filter_id, filter_name, filter_type in snapshot["filters"]:
+            if filter_type in common_filters and filter_id not in active_filter_ids:
+                available_filters.append((filter_name, filter_id))
+
+    if cancelled is not None and cancelled():
+        return None
+
+    active_filters = sorted((filter_order.get(filter_id, len(filter_order)),
+                             snapshot["filter_names"].get(filter_id, filter_id), filter_id)
+                            for filter_id in active_filter_ids)
+
+    if snapshot["mixed_types"]:
+        filter_types = supported_filters(snapshot["light_types"], LIGHT_TYPES)
     else:
-        pass
+        filter_types = common_filters
 
-    active_list_names = []
+    return {"filter_types": sorted(filter_types) if filter_types is not None else None,
+            "active": [(filter_name, filter_id) for position, filter_name, filter_id in active_filters],
+            "available": sorted(available_filters)}
 
-    for num in range(ui_active_list.count()):
-        active_list_names.append(ui_active_list.item(num).text())
 
-    available_list_names = []
+def update_filter_items(ui_list_widget, filter_items, ordered=False):
+    """
+    Update a Light Filters list widget to the given items, touching only changed rows.
+    :param ui_list_widget: list widget ui object
+    :param filter_items: List of (Light Filter name, Light Filter ID) tuples
+    :param ordered: move rows into filter_items order, for unsorted list widgets
+    :return: None
+    """
 
-    ui_available_list.clear()
-    for filter_name in filter_names:
-        if filter_name not in active_list_names:
-            available_list_names.append(filter_name)
-            filter_item = QtWidgets.QListWidgetItem(filter_name)
-            ui_available_list.addItem(filter_item)
+    new_items = dict((filter_id, filter_name) for filter_name, filter_id in filter_items)
+
+    for row in reversed(range(ui_list_widget.count())):
+        filter_item = ui_list_widget.item(row)
+        filter_id = filter_item.data(QtCore.Qt.UserRole)
+        if filter_id not in new_items:
+            ui_list_widget.takeItem(row)
         else:
-            pass
+            if filter_item.text() != new_items[filter_id]:
+                filter_item.setText(new_items[filter_id])
+            del new_items[filter_id]
 
-    return available_list_names
+    for filter_name, filter_id in filter_items:
+        if filter_id in new_items:
+            add_filter_item(ui_list_widget, filter_id, filter_name)
 
+    if ordered:
+        for target_row, (filter_name, filter_id) in enumerate(filter_items):
+            for row in range(target_row, ui_list_widget.count()):
+                if ui_list_widget.item(row).data(QtCore.Qt.UserRole) == filter_id:
+                    if row != target_row:
+                        ui_list_widget.insertItem(target_row, ui_list_widget.takeItem(row))
+                    break
 
-def light_blocker_geo(blocker_subnet, blocker_name, blocker_node):
+
+class FilterPanelWorker(QtCore.QObject):
     """
-    Create Light Blocker Shape and link it to the relevant Light Blocker Filter.
-    :param blocker_subnet: blocker subnet node
-    :param blocker_name: Light Blocker name string from UI
-    :param blocker_node: Light Blocker Filter Object Node
-    :return: None
+    Computes Filters panel contents from snapshots in a background thread.
+
+    Starting a new computation makes the running one stale, stale results are never emitted.
     """
 
-    # create blocker geo
-    geo = blocker_subnet.createNode('geo', blocker_name)
-    geo.moveToGoodPosition(move_inputs=False)
+    finished = QtCore.Signal(int, object)
 
-    # create shapes
-    box = geo.createNode('box')
-    sphere = geo.createNode('sphere')
-    grid = geo.createNode('grid')
-    tube = geo.createNode('tube')
-    switch = geo.createNode('switch')
-    color = geo.createNode('color')
-    convline = geo.createNode('convertline')
-    pack = geo.createNode('pack')
-    null = geo.createNode('null', 'OUT')
+    def __init__(self, parent=None):
+        """
+        Init Constructor
+        :param parent: parent QObject
+        """
 
-    # set geo Arnold Visibility values
-    geo.parm('ar_visibility_camera').set(0)
-    geo.parm('ar_visibility_shadow').set(0)
-    geo.parm('ar_visibility_diffuse_transmit').set(0)
-    geo.parm('ar_visibility_specular_transmit').set(0)
-    geo.parm('ar_visibility_diffuse_reflect').set(0)
-    geo.parm('ar_visibility_specular_reflect').set(0)
-    geo.parm('ar_visibility_volume').set(0)
-    geo.parm('ar_receive_shadows').set(0)
-    geo.parm('ar_self_shadows').set(0)
-    geo.parm('ar_opaque').set(0)
-    geo.parm('ar_skip').set(1)
+        super(FilterPanelWorker, self).__init__(parent)
 
-    # set connections
-    switch.setInput(0, box, 0)
-    switch.setInput(1, sphere, 0)
-    switch.setInput(2, grid, 0)
-    switch.setInput(3, tube, 0)
-    color.setInput(0, switch, 0)
-    convline.setInput(0, color, 0)
-    pack.setInput(0, convline, 0)
-    null.setInput(0, pack, 0)
-    geo.layoutChildren()
+        self.generation = 0
 
-    # set shape nodes values
-    sphere.parm('type').set(2)
-    sphere.parm('scale').set(0.5)
-    sphere.parm('rows').set(16)
-    sphere.parm('cols').set(16)
-    grid.parm('sizex').set(1)
-    grid.parm('sizey').set(1)
-    grid.parm('rx').set(90)
-    grid.parm('rows').set(2)
-    grid.parm('cols').set(2)
-    tube.parm('type').set(1)
-    tube.parm('cap').set(1)
-    tube.parm('rad1').set(0.5)
-    tube.parm('rad2').set(0.5)
-    tube.parm('cols').set(20)
-    color.parm('colorr').set(0.8)
-    color.parm('colorg').set(0.0)
-    color.parm('colorb').set(0.0)
-    convline.parm('computelength').set(0)
-    null.setDisplayFlag(1)
-    null.setRenderFlag(1)
+    def start(self, snapshot, LIGHT_TYPES):
+        """
+        Cancel the running computation and start a new one
+        :param snapshot: filter_panel_snapshot dictionary
+        :param LIGHT_TYPES: Dictionary of LIGHT_TYPES
+        :return: generation number of the new computation
+        """
 
-    # set switch python expression
-    switch.setExpressionLanguage(hou.exprLanguage.Python)
-    switch.parm("input").setExpression("""if hou.node("{0}").parm("geometry_type").eval() == "box":
-    return 0
-elif hou.node("{0}").parm("geometry_type").eval() == "sphere":
-    return 1
-elif hou.node("{0}").parm("geometry_type").eval() == "plane":
-    return 2
-else:
-    return 3""".format(blocker_node.path()))
+        self.generation += 1
+        thread = threading.Thread(target=self.run, args=(self.generation, snapshot, LIGHT_TYPES))
+        thread.daemon = True
+        thread.start()
 
-    # set 4x4 matrix
-    blocker_node.parm('geometry_matrix1').setExpression(
-        'ch("{0}/sx")*(cos(ch("{0}/ry"))*cos(ch("{0}/rz")))'.format(geo.path()))
-    blocker_node.parm('geometry_matrix2').setExpression(
-        'ch("{0}/sx")*(cos(ch("{0}/ry"))*sin(ch("{0}/rz")))'.format(geo.path()))
-    blocker_node.parm('geometry_matrix3').setExpression(
-        '-ch("{0}/sx")*(sin(ch("{0}/ry")))'.format(geo.path()))
-    blocker_node.parm('geometry_matrix5').setExpression(
-        '(-ch("{0}/sy")*(cos(ch("{0}/rx"))*sin(ch("{0}/rz"))))+(ch("{0}/sy")*(sin(ch("{0}/rx"))*sin(ch("{0}/ry"))*cos(ch("{0}/rz"))))'.format(geo.path()))
-    blocker_node.parm('geometry_matrix6').setExpression(
-        '(ch("{0}/sy")*(cos(ch("{0}/rx"))*cos(ch("{0}/rz"))))+(ch("{0}/sy")*(sin(ch("{0}/rx"))*sin(ch("{0}/ry"))*sin(ch("{0}/rz"))))'.format(geo.path()))
-    blocker_node.parm('geometry_matrix7').setExpression(
-        'ch("{0}/sy")*(sin(ch("{0}/rx"))*cos(ch("{0}/ry")))'.format(geo.path()))
-    blocker_node.parm('geometry_matrix9').setExpression(
-        '(ch("{0}/sz")*(sin(ch("{0}/rx"))*sin(ch("{0}/rz"))))+(ch("{0}/sz")*(cos(ch("{0}/rx"))*sin(ch("{0}/ry"))*cos(ch("{0}/rz"))))'.format(geo.path()))
-    blocker_node.parm('geometry_matrix10').setExpression(
-        '(-ch("{0}/sz")*(sin(ch("{0}/rx"))*cos(ch("{0}/rz"))))+(ch("{0}/sz")*(cos(ch("{0}/rx"))*sin(ch("{0}/ry"))*sin(ch("{0}/rz"))))'.format(geo.path()))
-    blocker_node.parm('geometry_matrix11').setExpression(
-        'ch("{0}/sz")*(cos(ch("{0}/rx"))*cos(ch("{0}/ry")))'.format(geo.path()))
-    blocker_node.parm('geometry_matrix13').setExpression('ch("{0}/tx")'.format(geo.path()))
-    blocker_node.parm('geometry_matrix14').setExpression('ch("{0}/ty")'.format(geo.path()))
-    blocker_node.parm('geometry_matrix15').setExpression('ch("{0}/tz")'.format(geo.path()))
+        return self.generation
+
+    def cancel(self):
+        """
+        Make the running computation stale
+        :return: None
+        """
+
+        self.generation += 1
 
+    def run(self, generation, snapshot, LIGHT_TYPES):
+        """
+        Background thread body, emits finished signal unless the computation got stale
+        :param generation: generation number of the computation
+        :param snapshot: filter_panel_snapshot dictionary
+        :param LIGHT_TYPES: Dictionary of LIGHT_TYPES
+        :return: None
+        """
 
-def display_message(message):
+        filter_panel = compute_filter_panel(snapshot, LIGHT_TYPES, lambda: generation != self.generation)
+        if filter_panel is not None and generation == self.generation:
+            self.finished.emit(generation, filter_panel)
+
+
+def add_filter_item(ui_list_widget, filter_id, filter_name):
     """
-    An information dialog popup.
-    :param message: text message
-    :return: None
+    Add a Light Filter item carrying the Light Filter ID in its user role.
+    :param ui_list_widget: list widget ui object
+    :param filter_id: Light Filter ID
+    :param filter_name: Light Filter name
+    :return: QListWidgetItem
+    """
+
+    filter_item = QtWidgets.QListWidgetItem(filter_name)
+    filter_item.setData(QtCore.Qt.UserRole, filter_id)
+    ui_list_widget.addItem(filter_item)
+
+    return filter_item
+
+
+def filter_node_id(filter_node):
+    """
+    Stable ID of a Light Filter, kept in node user data so it survives renames.
+    The ID is created on first use.
+    :param filter_node: Light Filter Object Node
+    :return: Light Filter ID string
     """
-    hou.ui.displayMessage(message)
 
+    filter_id = filter_node.userData(FILTER_ID_KEY)
+    if filter_id is None:
+        filter_id = uuid.uuid4().hex
+        filter_node.setUserData(FILTER_ID_KEY, filter_id)
 
-def list_filter(list_items, filter_lineedit, ui_list_widget):
+    return filter_id
+
+
+def stored_filter_id(filter_node):
     """
-    Filter out the list widget.
-    :param list_items: List items of list widget
-    :param filter_lineedit: line edit text to filter list widget items
-    :param ui_list_widget: list widget ui object
-    :return: None
+    ID of a Light Filter without creating one, for reading scenes without changing them.
+    :param filter_node: Light Filter Object Node
+    :return: Tuple (Light Filter ID string, or the node path when no ID is stored, True when the ID is stored)
+    """
+
+    filter_id = filter_node.userData(FILTER_ID_KEY)
+    if filter_id is None:
+        return filter_node.path(), False
+    else:
+        return filter_id, True
+
+
+def light_filter_nodes(filters_asn, filter_types):
+    """
+    Light Filters of registered Light Filter types, without the nodes of their input networks like Gobo images.
+    :param filters_asn: LFM_LIGHT_FILTERS_VOPNET node
+    :param filter_types: FilterRegistry of Light Filter types
+    :return: List of Light Filter nodes
+    """
+
+    return [filter_node for filter_node in filters_asn.children() if filter_node.type().name() in filter_types]
+
+
+def connect_fetch(light_node, filter_node):
+    """
+    Create a Fetch Node of the Light Filter inside the Light and wire it to the next free OUT_light input.
+    :param light_node: Light Object Node
+    :param filter_node: Light Filter Object Node
+    :return: Fetch Object Node
+    """
+
+    asn = light_node.node("shopnet/arnold_vopnet")
+    out_light = asn.node("OUT_light")
+
+    fetch_node = asn.createNode("arnold::fetch", filter_node.name())
+    fetch_node.parm("target").set(filter_node.path())
+    fetch_node.setUserData(FILTER_ID_KEY, filter_node_id(filter_node))
+
+    index = 2
+    while out_light.input(index) is not None:
+        index += 1
+    out_light.setInput(index, fetch_node, 0)
+
+    return fetch_node
+
+
+def intern_string(text):
+    """
+    :param text: string, like a node path or a Light Filter ID
+    :return: the one shared copy of the string, so equal strings kept in many indexes are stored once
+    """
+
+    if isinstance(text, str):
+        return intern(text)
+    return text
+
+
+class LightEntry(object):
+    """
+    Indexed Light: Light Type, attached Light Filter IDs with their Fetch node session IDs, and bit position.
+    """
+
+    __slots__ = ("light_type", "filter_ids", "fetch_ids", "bit")
+
+    def __init__(self, light_type, filter_ids, fetch_ids, bit):
+        """
+        Init Constructor
+        :param light_type: Light Type index
+        :param filter_ids: Tuple of Light Filter IDs
+        :param fetch_ids: Tuple of Fetch node session IDs, in filter_ids order
+        :param bit: bit position of the Light in Light Filter bitsets
+        """
+
+        self.light_type = light_type
+        self.filter_ids = filter_ids
+        self.fetch_ids = fetch_ids
+        self.bit = bit
+
+
+class FilterEntry(object):
+    """
+    Indexed Light Filter: last known name, and session IDs of its Light Filter and Light Blocker geo nodes.
+    """
+
+    __slots__ = ("name", "node_id", "blocker_id")
+
+    def __init__(self, name=None, node_id=None, blocker_id=None):
+        """
+        Init Constructor
+        :param name: Light Filter name, None if unknown
+        :param node_id: Light Filter node session ID, None if unknown
+        :param blocker_id: Light Blocker geo node session ID, None if there is none
+        """
+
+        self.name = name
+        self.node_id = node_id
+        self.blocker_id = blocker_id
+
+
+class LightFilterIndex(object):
+    """
+    Inverted indexes of Lights by Light Type and by attached Light Filter ID.
+
+    Facets are resolved with set operations over the indexes, and Light Filter, Light Blocker geo and Fetch
+    nodes are looked up by Light Filter ID through node session IDs.
+    Every Light also gets a bit position, and the Lights of each Light Filter are kept as an int bitset, so
+    selection queries are answered with AND/OR over one int per Light Filter instead of per Light set operations.
+    Each Light and Light Filter is kept in one slots record, and Light paths and Light Filter IDs are interned, so
+    all indexes share one string per Light and per Light Filter.
     """
 
-    filter_list = []
+    def __init__(self):
+        """
+        Init Constructor
+        """
+
+        self.light_entries = {}         # {Light path: LightEntry}
+        self.filter_entries = {}        # {Light Filter ID: FilterEntry}
+        self.type_lights = {}           # {Light Type index: set of Light paths}
+        self.filter_lights = {}         # {Light Filter ID: set of Light paths}
+        self.unfiltered_lights = set()  # Light paths without any Light Filter
+        self.bit_lights = []            # [Light path of each bit position, None for free positions]
+        self.free_bits = []             # bit positions of removed Lights, reused first
+        self.filter_bits = {}           # {Light Filter ID: int bitset of Light bit positions}
+
+    def clear(self):
+        """
+        Remove all Lights and Light Filters from the indexes
+        :return: None
+        """
+
+        self.light_entries.clear()
+        self.filter_entries.clear()
+        self.type_lights.clear()
+        self.filter_lights.clear()
+        self.unfiltered_lights.clear()
+        del self.bit_lights[:]
+        del self.free_bits[:]
+        self.filter_bits.clear()
+
+    def filter_entry(self, filter_id):
+        """
+        :param filter_id: Light Filter ID
+        :return: FilterEntry of the Light Filter, created when the Light Filter is not indexed yet
+        """
+
+        filter_entry = self.filter_entries.get(filter_id)
+        if filter_entry is None:
+            filter_entry = self.filter_entries[intern_string(filter_id)] = FilterEntry()
+
+        return filter_entry
+
+    def add_filter(self, filter_node):
+        """
+        Index a Light Filter node
+        :param filter_node: Light Filter Object Node
+        :return: Light Filter ID
+        """
+
+        filter_id = intern_string(filter_node_id(filter_node))
+        filter_entry = self.filter_entry(filter_id)
+        filter_entry.node_id = filter_node.sessionId()
+        filter_entry.name = filter_node.name()
+
+        return filter_id
+
+    def index_filters(self, filters_asn, blocker_subnet, filter_types):
+        """
+        Index all LFM Light Filters and Light Blocker geo nodes.
+        Copied Light Filters carry the Light Filter ID of their original in their user data, the later created node
+        of Light Filters sharing an ID gets a new ID.
+        :param filters_asn: LFM_LIGHT_FILTERS_VOPNET node
+        :param blocker_subnet: LFM_LIGHT_BLOCKER_SUBNET node
+        :param filter_types: FilterRegistry of Light Filter types
+        :return: List of Light Filter nodes given a new ID
+        """
+
+        filter_ids = set()
+        copied_filter_nodes = []
+        for filter_node in sorted(light_filter_nodes(filters_asn, filter_types),
+                                  key=lambda filter_node: filter_node.sessionId()):
+            if filter_node_id(filter_node) in filter_ids:
+                filter_node.setUserData(FILTER_ID_KEY, uuid.uuid4().hex)
+                copied_filter_nodes.append(filter_node)
+            filter_ids.add(self.add_filter(filter_node))
+        for filter_entry in self.filter_entries.values():
+            filter_entry.blocker_id = None
+        for blocker_geo in blocker_subnet.children():
+            # Light Blocker geo created before Light Filter IDs is named after its Light Filter
+            filter_node = filters_asn.node(blocker_geo.name())
+            if blocker_geo.userData(FILTER_ID_KEY) is None and filter_node is not None:
+                blocker_geo.setUserData(FILTER_ID_KEY, filter_node_id(filter_node))
+            if blocker_geo.userData(FILTER_ID_KEY) is not None:
+                self.filter_entry(blocker_geo.userData(FILTER_ID_KEY)).blocker_id = blocker_geo.sessionId()
+
+        return copied_filter_nodes
+
+    def remember_filter_name(self, filter_id, filter_name):
+        """
+        Keep a name for a Light Filter which has none yet, like the name of a Fetch node whose target is missing
+        :param filter_id: Light Filter ID
+        :param filter_name: Light Filter name
+        :return: None
+        """
+
+        filter_entry = self.filter_entry(filter_id)
+        if filter_entry.name is None:
+            filter_entry.name = filter_name
+
+    def add_light(self, light_path, light_type, fetches):
+        """
+        Index a Light, replacing its previous entries
+        :param light_path: Light path string
+        :param light_type: Light Type index
+        :param fetches: Dictionary {Light Filter ID: Fetch node session ID} of the Light
+        :return: None
+        """
+
+        self.remove_light(light_path)
+
+        light_path = intern_string(light_path)
+        filter_ids = tuple(intern_string(filter_id) for filter_id in fetches)
+
+        if self.free_bits:
+            bit = self.free_bits.pop()
+        else:
+            bit = len(self.bit_lights)
+            self.bit_lights.append(None)
+        self.bit_lights[bit] = light_path
+
+        self.light_entries[light_path] = LightEntry(light_type, filter_ids,
+                                                    tuple(fetches[filter_id] for filter_id in filter_ids), bit)
+        self.type_lights.setdefault(light_type, set()).add(light_path)
+        for filter_id in filter_ids:
+            self.filter_lights.setdefault(filter_id, set()).add(light_path)
+            self.filter_bits[filter_id] = self.filter_bits.get(filter_id, 0) | (1 << bit)
+        if not filter_ids:
+            self.unfiltered_lights.add(light_path)
+
+    def remove_light(self, light_path):
+        """
+        Remove a Light from the indexes
+        :param light_path: Light path string
+        :return: None
+        """
+
+        light_entry = self.light_entries.pop(light_path, None)
+        if light_entry is None:
+            return
+
+        for filter_id in light_entry.filter_ids:
+            self.filter_lights[filter_id].discard(light_path)
+            if not self.filter_lights[filter_id]:
+                del self.filter_lights[filter_id]
+            self.filter_bits[filter_id] &= ~(1 << light_entry.bit)
+            if not self.filter_bits[filter_id]:
+                del self.filter_bits[filter_id]
+        self.bit_lights[light_entry.bit] = None
+        self.free_bits.append(light_entry.bit)
+        self.type_lights[light_entry.light_type].discard(light_path)
+        self.unfiltered_lights.discard(light_path)
+
+    def set_light_type(self, light_path, light_type):
+        """
+        Move an indexed Light to another Light Type, keeping its Light Filter entries
+        :param light_path: Light path string
+        :param light_type: Light Type index
+        :return: None
+        """
+
+        light_entry = self.light_entries.get(light_path)
+        if light_entry is None or light_entry.light_type == light_type:
+            return
+
+        self.type_lights[light_entry.light_type].discard(light_path)
+        light_entry.light_type = light_type
+        self.type_lights.setdefault(light_type, set()).add(intern_string(light_path))
+
+    def has_light(self, light_path):
+        """
+        :param light_path: Light path string
+        :return: True if the Light is indexed
+        """
+
+        return light_path in self.light_entries
+
+    def light_filter_ids(self, light_path):
+        """
+        :param light_path: Light path string
+        :return: Tuple of Light Filter IDs attached on the Light, empty if the Light is not indexed
+        """
+
+        light_entry = self.light_entries.get(light_path)
+        if light_entry is None:
+            return ()
+        return light_entry.filter_ids
+
+    def light_filter_items(self):
+        """
+        :return: Generator of (Light path, Tuple of attached Light Filter IDs) of all indexed Lights
+        """
+
+        for light_path, light_entry in self.light_entries.items():
+            yield light_path, light_entry.filter_ids
+
+    def filter_ids(self):
+        """
+        :return: List of IDs of indexed Light Filter nodes
+        """
+
+        return [filter_id for filter_id, filter_entry in self.filter_entries.items()
+                if filter_entry.node_id is not None]
+
+    def blocker_filter_ids(self):
+        """
+        :return: List of IDs of Light Filters with a Light Blocker geo
+        """
+
+        return [filter_id for filter_id, filter_entry in self.filter_entries.items()
+                if filter_entry.blocker_id is not None]
+
+    def filter_names(self):
+        """
+        :return: Dictionary {Light Filter ID: last known Light Filter name}
+        """
+
+        return dict((filter_id, filter_entry.name) for filter_id, filter_entry in self.filter_entries.items()
+                    if filter_entry.name is not None)
+
+    def filter_node(self, filter_id):
+        """
+        :param filter_id: Light Filter ID
+        :return: Light Filter Object Node, None if it does not exist anymore
+        """
+
+        filter_entry = self.filter_entries.get(filter_id)
+        if filter_entry is None or filter_entry.node_id is None:
+            return None
+        return hou.nodeBySessionId(filter_entry.node_id)
+
+    def blocker_node(self, filter_id):
+        """
+        :param filter_id: Light Filter ID
+        :return: Light Blocker geo Object Node of the Light Filter, None if there is none
+        """
+
+        filter_entry = self.filter_entries.get(filter_id)
+        if filter_entry is None or filter_entry.blocker_id is None:
+            return None
+        return hou.nodeBySessionId(filter_entry.blocker_id)
+
+    def fetch_node(self, light_path, filter_id):
+        """
+        :param light_path: Light path string
+        :param filter_id: Light Filter ID
+        :return: Fetch Object Node of the Light Filter inside the Light, None if there is none
+        """
+
+        light_entry = self.light_entries.get(light_path)
+        if light_entry is None or filter_id not in light_entry.filter_ids:
+            return None
+        return hou.nodeBySessionId(light_entry.fetch_ids[light_entry.filter_ids.index(filter_id)])
+
+    def filter_name(self, filter_id):
+        """
+        :param filter_id: Light Filter ID
+        :return: Current Light Filter name, or last known name if the Light Filter does not exist anymore
+        """
+
+        filter_node = self.filter_node(filter_id)
+        if filter_node is not None:
+            self.filter_entries[filter_id].name = filter_node.name()
+
+        filter_entry = self.filter_entries.get(filter_id)
+        if filter_entry is None or filter_entry.name is None:
+            return filter_id
+        return filter_entry.name
+
+    def lights(self):
+        """
+        :return: Set of all indexed Light paths
+        """
+
+        return set(self.light_entries)
+
+    def lights_of_type(self, light_type):
+        """
+        :param light_type: Light Type index
+        :return: Set of Light paths of the Light Type
+        """
+
+        return self.type_lights.get(light_type, set())
+
+    def lights_with_filter(self, filter_id):
+        """
+        :param filter_id: Light Filter ID
+        :return: Set of Light paths with the Light Filter attached
+        """
+
+        return self.filter_lights.get(filter_id, set())
+
+    def lights_bitset(self, light_paths):
+        """
+        :param light_paths: Iterable of Light paths
+        :return: int bitset of the given Lights, Lights which are not indexed are left out
+        """
+
+        bits = ["0"] * len(self.bit_lights)
+        for light_path in light_paths:
+            if light_path in self.light_entries:
+                bits[-1 - self.light_entries[light_path].bit] = "1"
+
+        return int("".join(bits) or "0", 2)
+
+    def bitset_lights(self, bitset):
+        """
+        :param bitset: int bitset of Light bit positions
+        :return: Set of Light paths of the bitset
+        """
+
+        light_paths = set()
+        for bit, flag in enumerate(reversed(bin(bitset))):
+            if flag == "1":
+                light_paths.add(self.bit_lights[bit])
+
+        return light_paths
+
+    def lights_sharing_filters(self, light_paths):
+        """
+        :param light_paths: Iterable of Light paths
+        :return: Set of Light paths sharing at least one Light Filter with the given Lights
+        """
+
+        selection_bits = self.lights_bitset(light_paths)
+
+        sharing_bits = 0
+        for filter_bits in self.filter_bits.values():
+            if filter_bits & selection_bits:
+                sharing_bits |= filter_bits
+
+        return self.bitset_lights(sharing_bits)
+
+    def common_filters(self, light_paths):
+        """
+        :param light_paths: List of Light paths
+        :return: List of Light Filter IDs attached on all given Lights
+        """
 
-    for name in list_items:
-        if filter_lineedit.text() in name:
-            filter_list.append(name)
+        if not light_paths or any(light_path not in self.light_entries for light_path in light_paths):
+            return []
+
+        selection_bits = self.lights_bitset(light_paths)
+
+        return [filter_id for filter_id, filter_bits in self.filter_bits.items()
+                if filter_bits & selection_bits == selection_bits]
+
+    def any_filters(self, light_paths):
+        """
+        :param light_paths: Iterable of Light paths
+        :return: List of Light Filter IDs attached on at least one of the given Lights
+        """
+
+        selection_bits = self.lights_bitset(light_paths)
+
+        return [filter_id for filter_id, filter_bits in self.filter_bits.items() if filter_bits & selection_bits]
+
+    def filter_light_count(self, filter_id):
+        """
+        :param filter_id: Light Filter ID
+        :return: Number of Lights with the Light Filter attached
+        """
+
+        return bin(self.filter_bits.get(filter_id, 0)).count("1")
+
+
+class LightTreeItem(object):
+    """
+    Lights tree item, a Light or a node containing Lights.
+    """
+
+    __slots__ = ("path", "name", "parent", "row", "children", "fetched", "is_light", "has_children")
+
+    def __init__(self, path, parent=None, row=0, is_light=False, has_children=True):
+        """
+        Init Constructor
+        :param path: node path string
+        :param parent: parent LightTreeItem
+        :param row: row under parent item
+        :param is_light: True if the node is a Light
+        :param has_children: True if Lights exist under the node
+        """
+
+        self.path = path
+        self.name = path.rsplit("/", 1)[-1]
+        self.parent = parent
+        self.row = row
+        self.children = []
+        self.fetched = False
+        self.is_light = is_light
+        self.has_children = has_children
+
+
+class LightTreeModel(QtCore.QAbstractItemModel):
+    """
+    Lights tree model grouped by parent subnets.
+
+    Children of a subnet are created only when the subnet is expanded, by bisecting the sorted Light paths.
+    """
+
+    def __init__(self, parent=None, root_path="/obj"):
+        """
+        Init Constructor
+        :param parent: parent QObject
+        :param root_path: path of the node shown as tree root
+        """
+
+        super(LightTreeModel, self).__init__(parent)
+
+        self.root_path = root_path
+        self.light_paths = []
+        self.light_path_set = set()
+        self.root = LightTreeItem(root_path)
+        self.items = {}     # {node path: fetched LightTreeItem}
+
+    def set_light_paths(self, light_paths):
+        """
+        Replace the Lights shown in the tree
+        :param light_paths: Iterable of Light paths
+        :return: None
+        """
+
+        self.beginResetModel()
+        self.light_paths = sorted(light_paths)
+        self.light_path_set = set(self.light_paths)
+        self.root = LightTreeItem(self.root_path)
+        self.items = {}
+        self.endResetModel()
+
+    def descendant_range(self, path):
+        """
+        Range of sorted Light paths under a node path
+        :param path: node path string
+        :return: Tuple of (start, end) indexes into light_paths
+        """
+
+        # "0" is the character right after "/", so the range covers all paths starting with path + "/"
+        return bisect.bisect_left(self.light_paths, path + "/"), bisect.bisect_left(self.light_paths, path + "0")
+
+    def selected_light_paths(self, selection):
+        """
+        Light paths of all selected items and all Lights under them
+        :param selection: QItemSelection
+        :return: List of unique Light paths
+        """
+
+        light_paths = []
+        light_path_set = set()
+        for selection_range in selection:
+            for item in self.item(selection_range.parent()).children[selection_range.top():selection_range.bottom() + 1]:
+                start, end = self.descendant_range(item.path)
+                for light_path in ([item.path] if item.is_light else []) + self.light_paths[start:end]:
+                    if light_path not in light_path_set:
+                        light_path_set.add(light_path)
+                        light_paths.append(light_path)
+
+        return light_paths
+
+    def paths_selection(self, paths):
+        """
+        Selection of Lights and nodes containing Lights, with consecutive rows merged into ranges
+        :param paths: Iterable of node paths
+        :return: QItemSelection
+        """
+
+        items = []
+        for path in paths:
+            if self.path_index(path).isValid():
+                items.append(self.items[path])
+        items.sort(key=lambda item: (id(item.parent), item.row))
+
+        selection = QtCore.QItemSelection()
+        range_start = None
+        for position, item in enumerate(items):
+            if range_start is None:
+                range_start = item
+            next_item = items[position + 1] if position + 1 < len(items) else None
+            if next_item is None or next_item.parent is not item.parent or next_item.row != item.row + 1:
+                selection.select(self.createIndex(range_start.row, 0, range_start), self.createIndex(item.row, 0, item))
+                range_start = None
+
+        return selection
+
+    def path_index(self, path):
+        """
+        Index of a Light or of a node containing Lights, fetching its parent items when needed
+        :param path: node path string
+        :return: QModelIndex, invalid if no Light is shown at or under the path
+        """
+
+        start, end = self.descendant_range(path)
+        if not path.startswith(self.root_path + "/") or (path not in self.light_path_set and start == end):
+            return QtCore.QModelIndex()
+
+        if path not in self.items:
+            if not self.root.fetched:
+                self.fetchMore(QtCore.QModelIndex())
+            parent_path = self.root_path
+            for name in path[len(self.root_path) + 1:].split("/")[:-1]:
+                parent_path += "/" + name
+                parent_item = self.items.get(parent_path)
+                if parent_item is None:
+                    return QtCore.QModelIndex()
+                if not parent_item.fetched:
+                    self.fetchMore(self.createIndex(parent_item.row, 0, parent_item))
+
+        if path not in self.items:
+            return QtCore.QModelIndex()
+        return self.createIndex(self.items[path].row, 0, self.items[path])
+
+    def item(self, index):
+        """
+        :param index: QModelIndex
+        :return: LightTreeItem of the index
+        """
+
+        if index.isValid():
+            return index.internalPointer()
+        return self.root
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        """
+        Create index of a child item
+        :return: QModelIndex
+        """
+
+        parent_item = self.item(parent)
+        if column != 0 or row < 0 or row >= len(parent_item.children):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, parent_item.children[row])
+
+    def parent(self, index):
+        """
+        Parent index of an item
+        :return: QModelIndex
+        """
+
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        parent_item = index.internalPointer().parent
+        if parent_item is self.root:
+            return QtCore.QModelIndex()
+        return self.createIndex(parent_item.row, 0, parent_item)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        """
+        Number of fetched children
+        :return: int
+        """
+
+        if parent.column() > 0:
+            return 0
+        return len(self.item(parent).children)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        """
+        Single column of node names
+        :return: int
+        """
+
+        return 1
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        """
+        Node name for display, node path for tooltip and user role
+        :return: string or None
+        """
+
+        if not index.isValid():
+            return None
+        item = index.internalPointer()
+        if role == QtCore.Qt.DisplayRole:
+            return item.name
+        elif role in (QtCore.Qt.ToolTipRole, QtCore.Qt.UserRole):
+            return item.path
+        return None
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        """
+        True for nodes with Lights under them, before fetching them
+        :return: bool
+        """
+
+        return self.item(parent).has_children
+
+    def canFetchMore(self, parent):
+        """
+        True until children of an item are fetched
+        :return: bool
+        """
+
+        item = self.item(parent)
+        return item.has_children and not item.fetched
+
+    def fetchMore(self, parent):
+        """
+        Create child items of an expanded item
+        :return: None
+        """
+
+        item = self.item(parent)
+        item.fetched = True
+
+        children = []
+        child_paths = set()
+        start, end = self.descendant_range(item.path)
+        while start < end:
+            child_path = item.path + "/" + self.light_paths[start][len(item.path) + 1:].split("/", 1)[0]
+            child_start, child_end = self.descendant_range(child_path)
+            if child_path not in child_paths:
+                child_paths.add(child_path)
+                children.append(LightTreeItem(child_path, item, len(children), child_path in self.light_path_set,
+                                              child_start < child_end))
+            # step over the child Light itself, or skip all Lights under the child
+            if self.light_paths[start] == child_path:
+                start += 1
+            else:
+                start = child_end
+
+        if children:
+            self.beginInsertRows(parent, 0, len(children) - 1)
+            item.children = children
+            for child in children:
+                self.items[child.path] = child
+            self.endInsertRows()
+
+
+def filter_stacks(light_index):
+    """
+    Group Lights by identical Light Filter set, the stacks a shared filter-stack network would be built for.
+    :param light_index: LightFilterIndex of all Lights
+    :return: List of (frozenset of Light Filter IDs, sorted List of Light paths) tuples, largest group first
+    """
+
+    stacks = {}
+    for light_path, filter_ids in light_index.light_filter_items():
+        if filter_ids:
+            stacks.setdefault(frozenset(filter_ids), []).append(light_path)
+
+    return sorted(((filter_ids, sorted(light_paths)) for filter_ids, light_paths in stacks.items()),
+                  key=lambda stack: (-len(stack[1]), sorted(stack[0])))
+
+
+def light_fetch_order(light_node):
+    """
+    :param light_node: Light Object Node
+    :return: List of Light Filter IDs of the Fetch nodes wired into OUT_light, in input order
+    """
+
+    filter_ids = []
+    for input_node in light_node.node("shopnet/arnold_vopnet/OUT_light").inputs()[2:]:
+        if input_node is not None and input_node.userData(FILTER_ID_KEY) is not None:
+            filter_ids.append(input_node.userData(FILTER_ID_KEY))
+
+    return filter_ids
+
+
+def reorder_light_filters(light_nodes, filter_ids):
+    """
+    Rewire OUT_light inputs of Lights so the given Light Filters come first in the given order, followed by the
+    other Light Filter inputs in their current order, without gaps.
+    All Lights are rewired in one undo group with cooking paused until all are wired.
+    :param light_nodes: List of Light Object Nodes
+    :param filter_ids: List of Light Filter IDs in the new order
+    :return: Number of rewired Lights
+    """
+
+    filter_order = dict((filter_id, position) for position, filter_id in enumerate(filter_ids))
+
+    rewired_count = 0
+
+    update_mode = hou.updateModeSetting()
+    hou.setUpdateMode(hou.updateMode.Manual)
+    try:
+        with hou.undos.group("LFM Reorder Filters"):
+            for light_node in light_nodes:
+                out_light = light_node.node("shopnet/arnold_vopnet/OUT_light")
+                inputs = list(out_light.inputs()[2:])
+                new_inputs = sorted([input_node for input_node in inputs if input_node is not None],
+                                    key=lambda input_node: filter_order.get(input_node.userData(FILTER_ID_KEY),
+                                                                            len(filter_order)))
+                if new_inputs == inputs:
+                    continue
+
+                for index in range(len(inputs)):
+                    out_light.setInput(index + 2, None)
+                for index, input_node in enumerate(new_inputs):
+                    out_light.setInput(index + 2, input_node, 0)
+                rewired_count += 1
+    finally:
+        hou.setUpdateMode(update_mode)
+
+    return rewired_count
+
+
+def compact_filter_inputs(light_node):
+    """
+    Close the gaps left in the Light Filter inputs of a Light by destroyed Fetch nodes, keeping their order.
+    :param light_node: Light Object Node
+    :return: True if the Light was rewired
+    """
+
+    out_light = light_node.node("shopnet/arnold_vopnet/OUT_light")
+    inputs = list(out_light.inputs()[2:])
+    new_inputs = [input_node for input_node in inputs if input_node is not None]
+    if new_inputs == inputs:
+        return False
+
+    for index in range(len(inputs)):
+        out_light.setInput(index + 2, None)
+    for index, input_node in enumerate(new_inputs):
+        out_light.setInput(index + 2, input_node, 0)
+
+    return True
+
+
+def light_fetches(light_node, filter_types, light_index):
+    """
+    Fetch and Light Filter nodes inside a Light, by Light Filter ID.
+    Fetch nodes are indexed under the ID of the Light Filter they target, which they render whatever ID they were
+    created with. Only Fetch nodes whose target no longer exists, like a renamed Light Filter, are pointed back to
+    the Light Filter of their ID.
+    :param light_node: Light Object Node
+    :param filter_types: FilterRegistry of Light Filter types
+    :param light_index: LightFilterIndex, Fetch targets are added to it
+    :return: Dictionary {Light Filter ID: Fetch node session ID}
+    """
+
+    fetches = {}
+    for fetch_node in light_node.node("shopnet/arnold_vopnet").children():
+        if fetch_node.type().name() == "arnold::fetch":
+            filter_id = fetch_node.userData(FILTER_ID_KEY)
+            target_node = hou.node(fetch_node.parm("target").eval())
+            if target_node is not None and target_node.type().name() in filter_types:
+                if filter_id != filter_node_id(target_node):
+                    filter_id = filter_node_id(target_node)
+                    fetch_node.setUserData(FILTER_ID_KEY, filter_id)
+                if light_index.filter_node(filter_id) is None:
+                    light_index.add_filter(target_node)
+            elif filter_id is None:
+                filter_id = filter_node_id(fetch_node)
+            elif target_node is None and light_index.filter_node(filter_id) is not None:
+                fetch_node.parm("target").set(light_index.filter_node(filter_id).path())
+            light_index.remember_filter_name(filter_id, fetch_node.name())
+        elif fetch_node.type().name() in filter_types:
+            filter_id = light_index.add_filter(fetch_node)
+        else:
+            continue
+        fetches[filter_id] = fetch_node.sessionId()
+
+    return fetches
+
+
+def light_blocker_geo(blocker_subnet, blocker_name, blocker_node):
+    """
+    Create Light Blocker Shape and link it to the relevant Light Blocker Filter.
+    :param blocker_subnet: blocker subnet node
+    :param blocker_name: Light Blocker name string from UI
+    :param blocker_node: Light Blocker Filter Object Node
+    :return: None
+    """
+
+    # create blocker geo
+    geo = blocker_subnet.createNode('geo', blocker_name)
+    geo.moveToGoodPosition(move_inputs=False)
+    geo.setUserData(FILTER_ID_KEY, filter_node_id(blocker_node))
+
+    # create shapes
+    box = geo.createNode('box')
+    sphere = geo.createNode('sphere')
+    grid = geo.createNode('grid')
+    tube = geo.createNode('tube')
+    switch = geo.createNode('switch')
+    color = geo.createNode('color')
+    convline = geo.createNode('convertline')
+    pack = geo.createNode('pack')
+    null = geo.createNode('null', 'OUT')
+
+    # set geo Arnold Visibility values
+    geo.parm('ar_visibility_camera').set(0)
+    geo.parm('ar_visibility_shadow').set(0)
+    geo.parm('ar_visibility_diffuse_transmit').set(0)
+    geo.parm('ar_visibility_specular_transmit').set(0)
+    geo.parm('ar_visibility_diffuse_reflect').set(0)
+    geo.parm('ar_visibility_specular_reflect').set(0)
+    geo.parm('ar_visibility_volume').set(0)
+    geo.parm('ar_receive_shadows').set(0)
+    geo.parm('ar_self_shadows').set(0)
+    geo.parm('ar_opaque').set(0)
+    geo.parm('ar_skip').set(1)
+
+    # set connections
+    switch.setInput(0, box, 0)
+    switch.setInput(1, sphere, 0)
+    switch.setInput(2, grid, 0)
+    switch.setInput(3, tube, 0)
+    color.setInput(0, switch, 0)
+    convline.setInput(0, color, 0)
+    pack.setInput(0, convline, 0)
+    null.setInput(0, pack, 0)
+    geo.layoutChildren()
+
+    # set shape nodes values
+    sphere.parm('type').set(2)
+    sphere.parm('scale').set(0.5)
+    sphere.parm('rows').set(16)
+    sphere.parm('cols').set(16)
+    grid.parm('sizex').set(1)
+    grid.parm('sizey').set(1)
+    grid.parm('rx').set(90)
+    grid.parm('rows').set(2)
+    grid.parm('cols').set(2)
+    tube.parm('type').set(1)
+    tube.parm('cap').set(1)
+    tube.parm('rad1').set(0.5)
+    tube.parm('rad2').set(0.5)
+    tube.parm('cols').set(20)
+    color.parm('colorr').set(0.8)
+    color.parm('colorg').set(0.0)
+    color.parm('colorb').set(0.0)
+    convline.parm('computelength').set(0)
+    null.setDisplayFlag(1)
+    null.setRenderFlag(1)
+
+    # set switch python expression
+    switch.setExpressionLanguage(hou.exprLanguage.Python)
+    switch.parm("input").setExpression("""if hou.node("{0}").parm("geometry_type").eval() == "box":
+    return 0
+elif hou.node("{0}").parm("geometry_type").eval() == "sphere":
+    return 1
+elif hou.node("{0}").parm("geometry_type").eval() == "plane":
+    return 2
+else:
+    return 3""".format(blocker_node.path()))
+
+    # set 4x4 matrix
+    link_blocker_matrix(blocker_node, geo)
+
+
+def link_blocker_matrix(blocker_node, geo):
+    """
+    Drive Light Blocker Filter matrix with expressions of the Light Blocker geo transforms.
+    :param blocker_node: Light Blocker Filter Object Node
+    :param geo: Light Blocker geo Object Node
+    :return: None
+    """
+
+    for parm_name in BLOCKER_MATRIX_PARMS:
+        blocker_node.parm(parm_name).deleteAllKeyframes()
+
+    blocker_node.parm('geometry_matrix1').setExpression(
+        'ch("{0}/sx")*(cos(ch("{0}/ry"))*cos(ch("{0}/rz")))'.format(geo.path()))
+    blocker_node.parm('geometry_matrix2').setExpression(
+        'ch("{0}/sx")*(cos(ch("{0}/ry"))*sin(ch("{0}/rz")))'.format(geo.path()))
+    blocker_node.parm('geometry_matrix3').setExpression(
+        '-ch("{0}/sx")*(sin(ch("{0}/ry")))'.format(geo.path()))
+    blocker_node.parm('geometry_matrix5').setExpression(
+        '(-ch("{0}/sy")*(cos(ch("{0}/rx"))*sin(ch("{0}/rz"))))+(ch("{0}/sy")*(sin(ch("{0}/rx"))*sin(ch("{0}/ry"))*cos(ch("{0}/rz"))))'.format(geo.path()))
+    blocker_node.parm('geometry_matrix6').setExpression(
+        '(ch("{0}/sy")*(cos(ch("{0}/rx"))*cos(ch("{0}/rz"))))+(ch("{0}/sy")*(sin(ch("{0}/rx"))*sin(ch("{0}/ry"))*sin(ch("{0}/rz"))))'.format(geo.path()))
+    blocker_node.parm('geometry_matrix7').setExpression(
+        'ch("{0}/sy")*(sin(ch("{0}/rx"))*cos(ch("{0}/ry")))'.format(geo.path()))
+    blocker_node.parm('geometry_matrix9').setExpression(
+        '(ch("{0}/sz")*(sin(ch("{0}/rx"))*sin(ch("{0}/rz"))))+(ch("{0}/sz")*(cos(ch("{0}/rx"))*sin(ch("{0}/ry"))*cos(ch("{0}/rz"))))'.format(geo.path()))
+    blocker_node.parm('geometry_matrix10').setExpression(
+        '(-ch("{0}/sz")*(sin(ch("{0}/rx"))*cos(ch("{0}/rz"))))+(ch("{0}/sz")*(cos(ch("{0}/rx"))*sin(ch("{0}/ry"))*sin(ch("{0}/rz"))))'.format(geo.path()))
+    blocker_node.parm('geometry_matrix11').setExpression(
+        'ch("{0}/sz")*(cos(ch("{0}/rx"))*cos(ch("{0}/ry")))'.format(geo.path()))
+    blocker_node.parm('geometry_matrix13').setExpression('ch("{0}/tx")'.format(geo.path()))
+    blocker_node.parm('geometry_matrix14').setExpression('ch("{0}/ty")'.format(geo.path()))
+    blocker_node.parm('geometry_matrix15').setExpression('ch("{0}/tz")'.format(geo.path()))
+
+
+def blocker_matrices(transforms):
+    """
+    Light Blocker matrix values from Light Blocker geo transforms, for all blockers and frames at once.
+    Same math as the matrix expressions of link_blocker_matrix.
+    :param transforms: numpy array (blockers, frames, 9) of BLOCKER_TRANSFORM_PARMS values
+    :return: numpy array (blockers, frames, 12) of BLOCKER_MATRIX_PARMS values
+    """
+
+    import numpy
+
+    tx, ty, tz = transforms[..., 0], transforms[..., 1], transforms[..., 2]
+    rx, ry, rz = numpy.radians(transforms[..., 3]), numpy.radians(transforms[..., 4]), numpy.radians(transforms[..., 5])
+    sx, sy, sz = transforms[..., 6], transforms[..., 7], transforms[..., 8]
+    cos_x, cos_y, cos_z = numpy.cos(rx), numpy.cos(ry), numpy.cos(rz)
+    sin_x, sin_y, sin_z = numpy.sin(rx), numpy.sin(ry), numpy.sin(rz)
+
+    return numpy.stack([sx * cos_y * cos_z,
+                        sx * cos_y * sin_z,
+                        -sx * sin_y,
+                        -sy * cos_x * sin_z + sy * sin_x * sin_y * cos_z,
+                        sy * cos_x * cos_z + sy * sin_x * sin_y * sin_z,
+                        sy * sin_x * cos_y,
+                        sz * sin_x * sin_z + sz * cos_x * sin_y * cos_z,
+                        -sz * sin_x * cos_z + sz * cos_x * sin_y * sin_z,
+                        sz * cos_x * cos_y,
+                        tx, ty, tz], axis=-1)
+
+
+def bake_light_blockers(blockers, start_frame, end_frame):
+    """
+    Replace Light Blocker matrix expressions with values sampled once over a frame range.
+    Matrix parameters which do not change over the range are set as constants, others are keyframed.
+    :param blockers: List of (Light Blocker Filter Object Node, Light Blocker geo Object Node) tuples
+    :param start_frame: first frame to sample
+    :param end_frame: last frame to sample, not before start_frame
+    :return: Tuple of (number of keyframed parameters, number of constant parameters)
+    """
+
+    import numpy
+
+    frames = list(range(int(start_frame), int(end_frame) + 1))
+    if not frames:
+        raise ValueError("Empty frame range {0} - {1}".format(start_frame, end_frame))
+
+    transforms = numpy.array([[[blocker_geo.parm(parm_name).evalAtFrame(frame) for parm_name in BLOCKER_TRANSFORM_PARMS]
+                               for frame in frames] for blocker_node, blocker_geo in blockers], dtype=float)
+    matrices = blocker_matrices(transforms)
+    constants = numpy.all(numpy.isclose(matrices, matrices[:, :1, :]), axis=1)
+
+    keyframed_count = 0
+    constant_count = 0
+
+    with hou.undos.group("LFM Bake Light Blockers"):
+        for blocker_index, (blocker_node, blocker_geo) in enumerate(blockers):
+            constant_parms = {}
+            for matrix_index, parm_name in enumerate(BLOCKER_MATRIX_PARMS):
+                parm = blocker_node.parm(parm_name)
+                parm.deleteAllKeyframes()
+                values = matrices[blocker_index, :, matrix_index].tolist()
+                if constants[blocker_index, matrix_index]:
+                    constant_parms[parm_name] = values[0]
+                    continue
+
+                keyframes = []
+                for frame, value in zip(frames, values):
+                    keyframe = hou.Keyframe()
+                    keyframe.setFrame(frame)
+                    keyframe.setValue(value)
+                    keyframe.setExpression("linear()")
+                    keyframes.append(keyframe)
+                parm.setKeyframes(keyframes)
+                keyframed_count += 1
+
+            blocker_node.setParms(constant_parms)
+            constant_count += len(constant_parms)
+
+    return keyframed_count, constant_count
+
+
+def light_blocker_guide(blocker_subnet, blocker_name, blocker_node):
+    """
+    Mark a Light Blocker Filter to be drawn by the Blocker Guides viewer state, without creating Light Blocker geo.
+    Its matrix keeps plain values, edited with the transform handle of the viewer state.
+    :param blocker_subnet: blocker subnet node
+    :param blocker_name: Light Blocker name string from UI
+    :param blocker_node: Light Blocker Filter Object Node
+    :return: None
+    """
+
+    blocker_node.setUserData(BLOCKER_GUIDE_KEY, "1")
+
+
+def convert_blocker_guides(blockers):
+    """
+    Replace Light Blocker geo of Light Blocker Filters with viewport guides, in one undo group.
+    Matrix expressions linked to the geo are replaced by their values at the current frame, baked keyframes are kept.
+    :param blockers: List of (Light Blocker Filter Object Node, Light Blocker geo Object Node) tuples
+    :return: None
+    """
+
+    with hou.undos.group("LFM Convert Light Blocker Guides"):
+        for blocker_node, blocker_geo in blockers:
+            for parm_name in BLOCKER_MATRIX_PARMS:
+                parm = blocker_node.parm(parm_name)
+                if parm.keyframes() and blocker_geo.path() in parm.expression():
+                    value = parm.eval()
+                    parm.deleteAllKeyframes()
+                    parm.set(value)
+
+            light_blocker_guide(blocker_geo.parent(), blocker_geo.name(), blocker_node)
+            blocker_geo.destroy()
+
+
+def blocker_guide_shape(geometry_type):
+    """
+    Light Blocker shape built with SOP verbs, so no SOP network is needed to draw it.
+    :param geometry_type: Light Blocker geometry_type parameter value
+    :return: hou.Geometry
+    """
+
+    verb_name, verb_parms = BLOCKER_GUIDE_SHAPES.get(geometry_type, BLOCKER_GUIDE_SHAPES["cylinder"])
+    verb = hou.sopNodeTypeCategory().nodeVerb(verb_name)
+    verb.setParms(verb_parms)
+
+    geometry = hou.Geometry()
+    verb.execute(geometry, [])
+
+    return geometry
+
+
+def blocker_guide_matrix(blocker_node):
+    """
+    :param blocker_node: Light Blocker Filter Object Node
+    :return: hou.Matrix4 of the Light Blocker geometry_matrix at the current frame
+    """
+
+    return hou.Matrix4(blocker_node.parmTuple("geometry_matrix").eval())
+
+
+def set_blocker_guide_matrix(blocker_node, transform):
+    """
+    Set the Light Blocker matrix from transform components, with the transform and rotate orders of Light Blocker geo.
+    :param blocker_node: Light Blocker Filter Object Node
+    :param transform: Dictionary {"translate", "rotate", "scale"} of 3 float tuples
+    :return: None
+    """
+
+    blocker_node.parmTuple("geometry_matrix").set(hou.hmath.buildTransform(transform, "srt", "xyz").asTuple())
+
+
+class BlockerGuideState(object):
+    """
+    Viewer state drawing Light Blocker Filters marked by light_blocker_guide as viewport guides.
+
+    Clicking a guide picks its Light Blocker Filter, and the transform handle edits its matrix.
+    Guides of Light Blocker Filters created while the state is active show on the next time it is entered.
+    """
+
+    def __init__(self, state_name, scene_viewer, filters_asn_path=None):
+        """
+        Init Constructor
+        :param state_name: viewer state name
+        :param scene_viewer: hou.SceneViewer
+        :param filters_asn_path: LFM_LIGHT_FILTERS_VOPNET path
+        """
+
+        self.state_name = state_name
+        self.scene_viewer = scene_viewer
+        self.filters_asn_path = filters_asn_path
+
+        # {geometry_type: hou.Geometry} and {Light Blocker Filter session ID: hou.GeometryDrawable}
+        self.shapes = {}
+        self.drawables = {}
+
+        # Session ID of the Light Blocker Filter edited with the transform handle
+        self.blocker_id = None
+        self.handle = hou.Handle(scene_viewer, BLOCKER_GUIDE_HANDLE)
+
+    def blocker_nodes(self):
+        """
+        :return: List of Light Blocker Filter Object Nodes drawn as guides
+        """
+
+        filters_asn = hou.node(self.filters_asn_path)
+        if filters_asn is None:
+            return []
+
+        return [filter_node for filter_node in filters_asn.children()
+                if filter_node.type().name() == "arnold::light_blocker" and filter_node.userData(BLOCKER_GUIDE_KEY)]
+
+    def shape(self, blocker_node):
+        """
+        :param blocker_node: Light Blocker Filter Object Node
+        :return: hou.Geometry of the Light Blocker geometry type, built once per type
+        """
+
+        geometry_type = blocker_node.parm("geometry_type").eval()
+        if geometry_type not in self.shapes:
+            self.shapes[geometry_type] = blocker_guide_shape(geometry_type)
+
+        return self.shapes[geometry_type]
+
+    def sync_drawables(self):
+        """
+        Create one line drawable per guide Light Blocker Filter, and hide drawables of removed ones
+        :return: None
+        """
+
+        drawables = {}
+        for blocker_node in self.blocker_nodes():
+            drawable = self.drawables.get(blocker_node.sessionId())
+            if drawable is None:
+                drawable = hou.GeometryDrawable(self.scene_viewer, hou.drawableGeometryType.Line, blocker_node.path(),
+                                                params={"color1": hou.Vector4(0.8, 0.0, 0.0, 1.0)})
+            drawable.setGeometry(self.shape(blocker_node))
+            drawable.show(True)
+            drawables[blocker_node.sessionId()] = drawable
+
+        for session_id, drawable in self.drawables.items():
+            if session_id not in drawables:
+                drawable.show(False)
+        self.drawables = drawables
+
+        if self.blocker_id not in drawables:
+            self.pick(None)
+
+    def blocker_node(self):
+        """
+        :return: Light Blocker Filter Object Node edited with the transform handle, None if there is none
+        """
+
+        if self.blocker_id is None:
+            return None
+        return hou.nodeBySessionId(self.blocker_id)
+
+    def pick(self, blocker_id):
+        """
+        Edit a Light Blocker Filter with the transform handle
+        :param blocker_id: Light Blocker Filter session ID, None to hide the handle
+        :return: None
+        """
+
+        self.blocker_id = blocker_id
+        self.handle.show(blocker_id is not None)
+        if blocker_id is not None:
+            self.handle.update()
+
+    def intersect(self, origin, direction):
+        """
+        Nearest guide Light Blocker Filter hit by a ray
+        :param origin: hou.Vector3 ray origin in world space
+        :param direction: hou.Vector3 ray direction in world space
+        :return: Light Blocker Filter session ID, None when no guide is hit
+        """
+
+        hits = []
+        for session_id in self.drawables:
+            blocker_node = hou.nodeBySessionId(session_id)
+            if blocker_node is None:
+                continue
+            matrix = blocker_guide_matrix(blocker_node)
+            try:
+                inverse = matrix.inverted()
+            except hou.OperationFailed:
+                continue
+
+            local_origin = origin * inverse
+            local_direction = (origin + direction) * inverse - local_origin
+            position, normal, uvw = hou.Vector3(), hou.Vector3(), hou.Vector3()
+            if self.shape(blocker_node).intersect(local_origin, local_direction, position, normal, uvw) >= 0:
+                hits.append(((position * matrix).distanceTo(origin), blocker_node.path(), session_id))
+
+        if not hits:
+            return None
+        return min(hits)[2]
+
+    def onEnter(self, kwargs):
+        self.sync_drawables()
+        self.pick(None)
+        self.scene_viewer.setPromptMessage("Click a Light Blocker guide to transform it.")
+
+    def onResume(self, kwargs):
+        self.sync_drawables()
+        self.scene_viewer.setPromptMessage("Click a Light Blocker guide to transform it.")
+
+    def onExit(self, kwargs):
+        for drawable in self.drawables.values():
+            drawable.show(False)
+        self.scene_viewer.clearPromptMessage()
+
+    def onMouseEvent(self, kwargs):
+        ui_event = kwargs["ui_event"]
+        if ui_event.reason() != hou.uiEventReason.Picked or not ui_event.device().isLeftButton():
+            return False
+
+        origin, direction = ui_event.ray()
+        self.pick(self.intersect(origin, direction))
+
+        return True
+
+    def onDraw(self, kwargs):
+        draw_handle = kwargs["draw_handle"]
+        for session_id, drawable in self.drawables.items():
+            blocker_node = hou.nodeBySessionId(session_id)
+            if blocker_node is not None:
+                drawable.setGeometry(self.shape(blocker_node))
+                drawable.setTransform(blocker_guide_matrix(blocker_node))
+                drawable.draw(draw_handle)
+
+    def onBeginHandleToState(self, kwargs):
+        self.scene_viewer.beginStateUndo("LFM Transform Light Blocker")
+
+    def onEndHandleToState(self, kwargs):
+        self.scene_viewer.endStateUndo()
+
+    def onHandleToState(self, kwargs):
+        blocker_node = self.blocker_node()
+        if blocker_node is None:
+            return
+
+        parms = kwargs["parms"]
+        set_blocker_guide_matrix(blocker_node, {"translate": (parms["tx"], parms["ty"], parms["tz"]),
+                                                "rotate": (parms["rx"], parms["ry"], parms["rz"]),
+                                                "scale": (parms["sx"], parms["sy"], parms["sz"])})
+
+    def onStateToHandle(self, kwargs):
+        blocker_node = self.blocker_node()
+        if blocker_node is None:
+            return
+
+        components = blocker_guide_matrix(blocker_node).explode(transform_order="srt", rotate_order="xyz")
+        parms = kwargs["parms"]
+        for index, axis in enumerate("xyz"):
+            parms["t" + axis] = components["translate"][index]
+            parms["r" + axis] = components["rotate"][index]
+            parms["s" + axis] = components["scale"][index]
+
+
+def register_blocker_guide_state(filters_asn):
+    """
+    Register the Blocker Guides viewer state once per Houdini session
+    :param filters_asn: LFM_LIGHT_FILTERS_VOPNET node
+    :return: None
+    """
+
+    if hou.ui.isRegisteredViewerState(BLOCKER_GUIDE_STATE):
+        return
+
+    template = hou.ViewerStateTemplate(BLOCKER_GUIDE_STATE, "LFM Blocker Guides", hou.objNodeTypeCategory())
+    template.bindFactory(partial(BlockerGuideState, filters_asn_path=filters_asn.path()))
+    template.bindHandle("xform", BLOCKER_GUIDE_HANDLE)
+    hou.ui.registerViewerState(template)
+
+
+def filter_parm_table(filter_nodes):
+    """
+    Parameter values of Light Filters of the same type, for multi-editing.
+    Light Blocker matrix parameters are skipped since they are driven by the Light Blocker geo.
+    :param filter_nodes: List of Light Filter Object Nodes of one type
+    :return: List of (parameter name, list of values) tuples in parameter order
+    """
+
+    parm_table = []
+    for parm in filter_nodes[0].parms():
+        if not parm.name().startswith("geometry_matrix"):
+            parm_table.append((parm.name(), [filter_node.parm(parm.name()).eval() for filter_node in filter_nodes]))
+
+    return parm_table
+
+
+def apply_filter_parms(filter_parms):
+    """
+    Set parameters on many Light Filters in one undo group, with cooking paused until all are set.
+    :param filter_parms: List of (List of Light Filter Object Nodes, Dictionary {parameter name: value}) tuples
+    :return: None
+    """
+
+    update_mode = hou.updateModeSetting()
+    hou.setUpdateMode(hou.updateMode.Manual)
+    try:
+        with hou.undos.group("LFM Edit Filter Parameters"):
+            for filter_nodes, parms in filter_parms:
+                for filter_node in filter_nodes:
+                    filter_node.setParms(parms)
+    finally:
+        hou.setUpdateMode(update_mode)
+
+
+def parm_key(parm):
+    """
+    Light Blocker matrix parameters are compared by value at the current frame and at their keyframes, as their
+    expressions refer to the Light Blocker geo of each Light Blocker.
+    :param parm: Parameter of a Light Filter node or of a node of its input network
+    :return: Tuple (parameter name, value), or (parameter name, keyframe scripts) when the parameter is animated or
+             driven by an expression
+    """
+
+    keyframes = parm.keyframes()
+    if parm.name() in BLOCKER_MATRIX_PARMS:
+        return parm.name(), parm.eval(), tuple((keyframe.frame(), parm.evalAtFrame(keyframe.frame()))
+                                               for keyframe in keyframes)
+    elif keyframes:
+        return parm.name(), tuple(keyframe.asCode() for keyframe in keyframes)
+    else:
+        return parm.name(), parm.eval()
+
+
+def filter_network_key(filter_node):
+    """
+    Compare key of a Light Filter and its input network, independent of node names.
+    :param filter_node: Light Filter Object Node
+    :return: Tuple of (node type name, parm_key tuple, inputs tuple) for each input network node, then the Light Filter,
+             inputs are (input index, position of the input node in the network, input node output index)
+    """
+
+    network_nodes = input_network_nodes(filter_node) + [filter_node]
+
+    return tuple((node.type().name(),
+                  tuple(parm_key(parm) for parm in node.parms()),
+                  tuple((connection.inputIndex(), network_nodes.index(connection.inputNode()),
+                         connection.outputIndex()) for connection in node.inputConnections()))
+                 for node in network_nodes)
+
+
+def duplicate_filter_groups(filter_nodes):
+    """
+    Group Light Filters of the same type with identical parameter values, keyframes, expressions and input networks.
+    Light Blocker matrix parameters are compared by value, so Light Blockers only match when their geo matches.
+    :param filter_nodes: List of Light Filter Object Nodes, see light_filter_nodes
+    :return: List of lists of identical Light Filter Object Nodes, sorted by name, groups of one are skipped
+    """
+
+    groups = {}
+    for filter_node in filter_nodes:
+        groups.setdefault(filter_network_key(filter_node), []).append(filter_node)
+
+    duplicate_groups = []
+    for filter_group in groups.values():
+        if len(filter_group) > 1:
+            duplicate_groups.append(sorted(filter_group, key=lambda filter_node: filter_node.name()))
+
+    return sorted(duplicate_groups, key=lambda filter_group: filter_group[0].name())
+
+
+def merge_duplicate_filters(duplicate_groups, light_index):
+    """
+    Merge each group of identical Light Filters into its first Light Filter, in one undo group.
+    Fetch nodes of the other Light Filters are pointed to the first one, or removed when the Light already fetches it.
+    Input network nodes of removed Light Filters are removed once nothing else is wired to them, and the Light Filter
+    inputs of Lights losing a Fetch node are closed up.
+    :param duplicate_groups: duplicate_filter_groups list
+    :param light_index: LightFilterIndex of all Lights
+    :return: Tuple (Sorted list of removed node paths, Set of Light paths whose Fetch nodes changed)
+    """
+
+    removed_paths = []
+    light_paths = set()
+    compact_light_paths = set()
+
+    update_mode = hou.updateModeSetting()
+    hou.setUpdateMode(hou.updateMode.Manual)
+    try:
+        with hou.undos.group("LFM Merge Duplicate Filters"):
+            for filter_group in duplicate_groups:
+                keep_node = filter_group[0]
+                keep_id = filter_node_id(keep_node)
+                keep_lights = set(light_index.lights_with_filter(keep_id))
+                for filter_node in filter_group[1:]:
+                    filter_id = filter_node_id(filter_node)
+                    for light_path in light_index.lights_with_filter(filter_id):
+                        fetch_node = light_index.fetch_node(light_path, filter_id)
+                        if fetch_node is None:
+                            continue
+                        if light_path in keep_lights:
+                            removed_paths.append(fetch_node.path())
+                            fetch_node.destroy()
+                            compact_light_paths.add(light_path)
+                        else:
+                            fetch_node.parm("target").set(keep_node.path())
+                            fetch_node.setUserData(FILTER_ID_KEY, keep_id)
+                            fetch_node.setName(keep_node.name(), unique_name=True)
+                            keep_lights.add(light_path)
+                        light_paths.add(light_path)
+
+                    if light_index.blocker_node(filter_id) is not None:
+                        removed_paths.append(light_index.blocker_node(filter_id).path())
+                        light_index.blocker_node(filter_id).destroy()
+                    network_nodes = input_network_nodes(filter_node)
+                    removed_paths.append(filter_node.path())
+                    filter_node.destroy()
+                    for input_node in reversed(network_nodes):
+                        if not input_node.outputs():
+                            removed_paths.append(input_node.path())
+                            input_node.destroy()
+                        else:
+                            pass
+
+            for light_path in sorted(compact_light_paths):
+                compact_filter_inputs(hou.node(light_path))
+    finally:
+        hou.setUpdateMode(update_mode)
+
+    return sorted(removed_paths), light_paths
+
+
+def filter_removal_plan(filter_ids, light_index):
+    """
+    Plan the removal of Light Filters: each Light Filter once, its Light Blocker geo, and the Fetch nodes
+    referencing it on every indexed Light, not only on selected Lights.
+    :param filter_ids: Iterable of Light Filter IDs, repeated IDs are planned once
+    :param light_index: LightFilterIndex of all Lights
+    :return: Dictionary {"filter_ids": List of planned Light Filter IDs, "fetches", "blockers", "filters": Lists of
+             nodes to destroy, "lights": sorted Light paths whose Fetch nodes are destroyed}
+    """
+
+    plan = {"filter_ids": [], "fetches": [], "blockers": [], "filters": [], "lights": []}
+    planned_ids = set()
+    light_paths = set()
+
+    for filter_id in filter_ids:
+        if filter_id in planned_ids:
+            continue
+        planned_ids.add(filter_id)
+        plan["filter_ids"].append(filter_id)
+
+        for light_path in sorted(light_index.lights_with_filter(filter_id)):
+            fetch_node = light_index.fetch_node(light_path, filter_id)
+            if fetch_node is not None:
+                plan["fetches"].append(fetch_node)
+                light_paths.add(light_path)
+
+        if light_index.blocker_node(filter_id) is not None:
+            plan["blockers"].append(light_index.blocker_node(filter_id))
+        if light_index.filter_node(filter_id) is not None:
+            plan["filters"].append(light_index.filter_node(filter_id))
+
+    plan["lights"] = sorted(light_paths)
+
+    return plan
+
+
+def remove_filters(plan, operation):
+    """
+    Destroy the nodes of a filter_removal_plan in one batch with cooking paused, Fetch nodes first.
+    :param plan: filter_removal_plan dictionary
+    :param operation: ChunkedOperation reporting progress of the removal
+    :return: List of destroyed node paths
+    """
+
+    removed_paths = []
+
+    update_mode = hou.updateModeSetting()
+    hou.setUpdateMode(hou.updateMode.Manual)
+    try:
+        for node in operation.items(plan["fetches"] + plan["blockers"] + plan["filters"]):
+            removed_paths.append(node.path())
+            node.destroy()
+    finally:
+        hou.setUpdateMode(update_mode)
+
+    return removed_paths
+
+
+class FilterType(object):
+    """
+    Descriptor of a Light Filter type.
+    """
+
+    __slots__ = ("node_type", "label", "node_name", "light_types", "post_create")
+
+    def __init__(self, node_type, label, node_name, light_types, post_create=None):
+        """
+        Init Constructor
+        :param node_type: Light Filter node type name
+        :param label: name shown in Add Filter drop-down list
+        :param node_name: default Light Filter node name
+        :param light_types: List of Light Type indexes supporting the Light Filter
+        :param post_create: function called with (blocker subnet, Light Filter name, Light Filter node) after creation
+        """
+
+        self.node_type = node_type
+        self.label = label
+        self.node_name = node_name
+        self.light_types = list(light_types)
+        self.post_create = post_create
+
+
+class FilterRegistry(object):
+    """
+    Light Filter types indexed by node type and by label.
+
+    light_types keeps {Light Type index: List of supported Light Filter node types} up to date, so Light Type
+    lookups do not scan the registered types.
+    errors lists the custom Light Filter type files and entries which could not be loaded.
+    """
+
+    def __init__(self, filter_types=()):
+        """
+        Init Constructor
+        :param filter_types: Iterable of FilterType
+        """
+
+        self.types = OrderedDict()
+        self.labels = {}
+        self.light_types = {}
+        self.errors = []
+
+        for filter_type in filter_types:
+            self.register(filter_type)
+
+    def register(self, filter_type):
+        """
+        Add a Light Filter type, replacing a registered type of the same node type
+        :param filter_type: FilterType
+        :return: None
+        """
+
+        if filter_type.node_type in self.types:
+            self.unregister(filter_type.node_type)
+
+        self.types[filter_type.node_type] = filter_type
+        self.labels[filter_type.label] = filter_type
+        for light_type in filter_type.light_types:
+            self.light_types.setdefault(light_type, []).append(filter_type.node_type)
+
+    def unregister(self, node_type):
+        """
+        Remove a Light Filter type
+        :param node_type: Light Filter node type name
+        :return: None
+        """
+
+        filter_type = self.types.pop(node_type)
+        del self.labels[filter_type.label]
+        for light_type in filter_type.light_types:
+            self.light_types[light_type].remove(node_type)
+
+    def __contains__(self, node_type):
+        return node_type in self.types
+
+    def __iter__(self):
+        return iter(self.types.values())
+
+    def get(self, node_type):
+        """
+        :param node_type: Light Filter node type name
+        :return: FilterType, None if the node type is not registered
+        """
+
+        return self.types.get(node_type)
+
+    def by_label(self, label):
+        """
+        :param label: Add Filter drop-down list name
+        :return: FilterType, None if no type has the label
+        """
+
+        return self.labels.get(label)
+
+    def load_config(self, config_path):
+        """
+        Register custom Light Filter types from a JSON file, a list of
+        {"type", "label", "name", "light_types", "post_create"} dictionaries.
+        post_create is optional, either a FILTER_HOOKS name or a "module:function" path.
+        An unreadable file or an invalid entry is skipped, and added to errors.
+        :param config_path: JSON file path
+        :return: None
+        """
+
+        try:
+            with open(config_path) as config_file:
+                entries = json.load(config_file)
+        except (IOError, ValueError) as error:
+            self.errors.append("{0}: {1}".format(config_path, error))
+            return
+
+        if not isinstance(entries, list):
+            self.errors.append("{0}: not a list of Light Filter types".format(config_path))
+            return
+
+        for index, entry in enumerate(entries):
+            try:
+                post_create = entry.get("post_create")
+                if post_create in FILTER_HOOKS:
+                    post_create = FILTER_HOOKS[post_create]
+                elif post_create:
+                    module_name, function_name = post_create.split(":")
+                    post_create = getattr(importlib.import_module(module_name), function_name)
+                filter_type = FilterType(entry["type"], entry["label"], entry["name"], entry["light_types"],
+                                         post_create)
+            except (AttributeError, ImportError, KeyError, TypeError, ValueError) as error:
+                self.errors.append("{0}: entry {1} skipped, {2}: {3}".format(config_path, index, type(error).__name__, error))
+            else:
+                self.register(filter_type)
+
+
+# Functions Light Filter types can run after creation
+FILTER_HOOKS = {"light_blocker_geo": light_blocker_geo, "light_blocker_guide": light_blocker_guide}
+
+
+def load_filter_types():
+    """
+    Built-in Arnold Light Filter types, plus custom types from the JSON files listed in the ALFM_FILTER_TYPES
+    environment variable (separated by os.pathsep). Files and entries which cannot be loaded are written to stderr.
+    :return: FilterRegistry
+    """
+
+    filter_types = FilterRegistry([
+        FilterType("arnold::barndoor", "Barndoor", "LFM_barndoor1", [2]),
+        FilterType("arnold::gobo", "Gobo", "LFM_gobo1", [2]),
+        FilterType("arnold::light_blocker", "Light Blocker", "LFM_light_blocker1", range(9), light_blocker_geo),
+        FilterType("arnold::light_decay", "Light Decay", "LFM_light_decay1", [0, 2, 3, 4, 5, 7, 8])])
+
+    for config_path in os.environ.get("ALFM_FILTER_TYPES", "").split(os.pathsep):
+        if config_path:
+            filter_types.load_config(config_path)
+
+    for error in filter_types.errors:
+        sys.stderr.write("ALFM_FILTER_TYPES " + error + "\n")
+
+    return filter_types
+
+
+def load_filter_presets(preset_path):
+    """
+    Load Light Filter presets from a JSON file.
+    :param preset_path: JSON presets file path
+    :return: Dictionary {Preset Name: List of Light Filter dictionaries}
+    """
+
+    try:
+        with open(preset_path) as preset_file:
+            return json.load(preset_file, object_pairs_hook=OrderedDict)
+    except (IOError, ValueError):
+        return {}
+
+
+def apply_filter_preset(preset, light_nodes, filters_asn, blocker_subnet, filter_types):
+    """
+    Create all Light Filters of a preset and attach them on the given lights in one undo group.
+    Every preset filter is attached only on the lights whose Light Type supports it.
+    :param preset: List of Light Filter dictionaries {"type", "name", "parms", "transform"}
+    :param light_nodes: List of Light Object Nodes
+    :param filters_asn: LFM_LIGHT_FILTERS_VOPNET node
+    :param blocker_subnet: LFM_LIGHT_BLOCKER_SUBNET node
+    :param filter_types: FilterRegistry of Light Filter types
+    :return: List of created Light Filter Object Nodes
+    """
+
+    light_type_indexes = {}
+    for light_node in light_nodes:
+        light_type_indexes[light_node.path()] = light_node.parm("ar_light_type").eval()
+
+    filter_nodes = []
+
+    with hou.undos.group("LFM Apply Preset"):
+        for preset_filter in preset:
+            filter_type = preset_filter["type"]
+            lights = [light_node for light_node in light_nodes
+                      if filter_type in filter_types.light_types.get(light_type_indexes[light_node.path()], [])]
+            if not lights:
+                continue
+
+            filter_node = filters_asn.createNode(filter_type, "LFM_" + preset_filter["name"])
+            filter_node.moveToGoodPosition(move_inputs=False)
+            if preset_filter.get("parms"):
+                filter_node.setParms(preset_filter["parms"])
+
+            if filter_types.get(filter_type).post_create is not None:
+                filter_types.get(filter_type).post_create(blocker_subnet, filter_node.name(), filter_node)
+            if preset_filter.get("transform") and blocker_subnet.node(filter_node.name()) is not None:
+                blocker_subnet.node(filter_node.name()).setParms(preset_filter["transform"])
+
+            for light_node in lights:
+                connect_fetch(light_node, filter_node)
+
+            filter_nodes.append(filter_node)
+
+    return filter_nodes
+
+
+def node_parm_values(node):
+    """
+    :param node: Light Filter node or a node of its input network
+    :return: Dictionary {parameter name: value} of parameters not at their default value, without Light Blocker matrix
+    """
+
+    parms = {}
+    for parm in node.parms():
+        if not parm.name().startswith("geometry_matrix") and not parm.isAtDefault():
+            parms[parm.name()] = parm.eval()
+
+    return parms
+
+
+def input_records(node):
+    """
+    :param node: Light Filter node or a node of its input network
+    :return: List of [input index, input node name, input node output index] of the wired inputs of the node
+    """
+
+    return [[connection.inputIndex(), connection.inputNode().name(), connection.outputIndex()]
+            for connection in node.inputConnections()]
+
+
+def input_network_nodes(node):
+    """
+    Nodes wired upstream of a node, each one listed after all of its own input nodes.
+    :param node: Light Filter node
+    :return: List of nodes
+    """
+
+    network_nodes = []
+    for connection in node.inputConnections():
+        for input_node in input_network_nodes(connection.inputNode()) + [connection.inputNode()]:
+            if input_node not in network_nodes:
+                network_nodes.append(input_node)
+
+    return network_nodes
+
+
+def filter_assignment_records(light_nodes, filters_asn, blocker_subnet, filter_types):
+    """
+    Generate export records of all LFM Light Filters, their input networks and their Light assignments.
+    Input network node records are generated before the Light Filter records wired to them, and Light Filter records
+    before Light records, so they can be applied while streaming.
+    Light Filters without a stored ID are recorded with their path as ID and "path_id", see stored_filter_id.
+    :param light_nodes: List of Light Object Nodes
+    :param filters_asn: LFM_LIGHT_FILTERS_VOPNET node
+    :param blocker_subnet: LFM_LIGHT_BLOCKER_SUBNET node
+    :param filter_types: FilterRegistry of Light Filter types
+    :return: Generator of record dictionaries
+    """
+
+    network_names = set()
+    for filter_node in light_filter_nodes(filters_asn, filter_types):
+        for network_node in input_network_nodes(filter_node):
+            if network_node.name() not in network_names:
+                network_names.add(network_node.name())
+                yield {"node": network_node.name(), "type": network_node.type().name(),
+                       "parms": node_parm_values(network_node), "inputs": input_records(network_node)}
+
+        filter_id, id_stored = stored_filter_id(filter_node)
+        record = {"id": filter_id, "filter": filter_node.name(), "type": filter_node.type().name(),
+                  "parms": node_parm_values(filter_node), "inputs": input_records(filter_node)}
+        if not id_stored:
+            record["path_id"] = True
+
+        blocker_geo = blocker_subnet.node(filter_node.name())
+        if blocker_geo is not None:
+            record["blocker"] = dict((name, blocker_geo.parm(name).eval()) for name in BLOCKER_TRANSFORM_PARMS)
+        elif filter_node.userData(BLOCKER_GUIDE_KEY):
+            record["guide"] = list(filter_node.parmTuple("geometry_matrix").eval())
+
+        yield record
+
+    for light_node in light_nodes:
+        out_light = light_node.node("shopnet/arnold_vopnet/OUT_light")
+        filter_ids = []
+        for fetch_node in out_light.inputs()[2:]:
+            if fetch_node is not None and fetch_node.type().name() == "arnold::fetch":
+                filter_node = hou.node(fetch_node.parm("target").eval())
+                if filter_node is not None:
+                    filter_ids.append(stored_filter_id(filter_node)[0])
+        if filter_ids:
+            yield {"light": light_node.path(), "filters": filter_ids}
+
+
+def export_filter_assignments(export_path, light_nodes, filters_asn, blocker_subnet, filter_types):
+    """
+    Stream all LFM Light Filters and Light assignments into a gzip compressed JSON Lines file.
+    :param export_path: export file path
+    :param light_nodes: List of Light Object Nodes
+    :param filters_asn: LFM_LIGHT_FILTERS_VOPNET node
+    :param blocker_subnet: LFM_LIGHT_BLOCKER_SUBNET node
+    :param filter_types: FilterRegistry of Light Filter types
+    :return: Number of written records
+    """
+
+    count = 0
+    with gzip.open(export_path, "wb") as export_file:
+        for record in filter_assignment_records(light_nodes, filters_asn, blocker_subnet, filter_types):
+            export_file.write((json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8"))
+            count += 1
+
+    return count
+
+
+def read_filter_assignments(import_path):
+    """
+    Stream records from an exported Light Filters assignment file, one line at a time.
+    :param import_path: exported file path
+    :return: Generator of record dictionaries
+    """
+
+    with gzip.open(import_path, "rb") as import_file:
+        for line in import_file:
+            if line.strip():
+                yield json.loads(line.decode("utf-8"))
+
+
+def import_input_network(node, inputs, network_records, network_nodes, filters_asn):
+    """
+    Create the exported input network of a node and wire it, creating each network node once.
+    :param node: Light Filter node or a node of its input network
+    :param inputs: input_records of the exported node
+    :param network_records: Dictionary {exported node name: network node record} read so far
+    :param network_nodes: Dictionary {exported node name: created node}, updated with created nodes
+    :param filters_asn: LFM_LIGHT_FILTERS_VOPNET node
+    :return: None
+    """
+
+    for input_index, input_name, output_index in inputs:
+        input_node = network_nodes.get(input_name)
+        if input_node is None:
+            if input_name not in network_records:
+                continue
+            network_record = network_records[input_name]
+            input_node = filters_asn.createNode(network_record["type"], input_name)
+            input_node.setParms(network_record["parms"])
+            input_node.moveToGoodPosition(move_inputs=False)
+            network_nodes[input_name] = input_node
+            import_input_network(input_node, network_record["inputs"], network_records, network_nodes, filters_asn)
+        node.setInput(input_index, input_node, output_index)
+
+
+def parse_path_map(path_map_text):
+    """
+    Read Light path prefix replacements typed as "source=target" entries separated by commas.
+    :param path_map_text: path remap text, like "/obj/old_rig=/obj/new_rig, /obj/set=/obj/set_v2"
+    :return: List of (source path prefix, target path prefix) tuples, for import_filter_assignments path_map
+    """
+
+    path_map = []
+    for entry in path_map_text.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if entry.count("=") != 1 or not entry.split("=")[0].strip():
+            raise ValueError("Path remap entry {0} is not source=target".format(entry))
+        source_prefix, target_prefix = entry.split("=")
+        path_map.append((source_prefix.strip(), target_prefix.strip()))
+
+    return path_map
+
+
+def import_filter_assignments(import_path, filters_asn, blocker_subnet, light_pattern="*", path_map=None):
+    """
+    Apply an exported Light Filters assignment file on the current scene in one undo group.
+    Lights are matched by path after path_map prefix replacement, or by name when the path is not found.
+    Input networks are rebuilt for Light Filters created by the import, and for existing ones with no wired input.
+    :param import_path: exported file path
+    :param filters_asn: LFM_LIGHT_FILTERS_VOPNET node
+    :param blocker_subnet: LFM_LIGHT_BLOCKER_SUBNET node
+    :param light_pattern: only Lights whose mapped path matches this pattern get assignments
+    :param path_map: List of (source path prefix, target path prefix) tuples
+    :return: Tuple of (number of filters, number of assigned lights, list of unmatched light paths)
+    """
+
+    lights_by_name = {}
+    for light_node in hou.objNodeTypeCategory().nodeType("arnold_light").instances():
+        lights_by_name.setdefault(light_node.name(), light_node)
+
+    filter_nodes = {}
+    for filter_node in filters_asn.children():
+        if filter_node.userData(FILTER_ID_KEY) is not None:
+            filter_nodes[filter_node.userData(FILTER_ID_KEY)] = filter_node
+
+    network_records = {}
+    network_nodes = {}
+
+    filter_count = 0
+    light_count = 0
+    unmatched_lights = []
+
+    with hou.undos.group("LFM Import Assignments"):
+        for record in read_filter_assignments(import_path):
+            if "node" in record:
+                network_records[record["node"]] = record
+                continue
+
+            if "filter" in record:
+                filter_node = filter_nodes.get(record["id"])
+                if filter_node is None:
+                    filter_node = filters_asn.createNode(record["type"], record["filter"])
+                    filter_node.setUserData(FILTER_ID_KEY, record["id"])
+                    filter_node.moveToGoodPosition(move_inputs=False)
+                    filter_nodes[record["id"]] = filter_node
+                filter_node.setParms(record["parms"])
+                if not filter_node.inputConnections():
+                    import_input_network(filter_node, record.get("inputs", []), network_records, network_nodes,
+                                         filters_asn)
+
+                if "blocker" in record:
+                    if blocker_subnet.node(filter_node.name()) is None:
+                        light_blocker_geo(blocker_subnet, filter_node.name(), filter_node)
+                    blocker_subnet.node(filter_node.name()).setParms(record["blocker"])
+                elif "guide" in record:
+                    light_blocker_guide(blocker_subnet, filter_node.name(), filter_node)
+                    filter_node.parmTuple("geometry_matrix").set(record["guide"])
+                filter_count += 1
+                continue
+
+            light_path = record["light"]
+            for source_prefix, target_prefix in path_map or []:
+                if light_path.startswith(source_prefix):
+                    light_path = target_prefix + light_path[len(source_prefix):]
+                    break
+            if not fnmatch.fnmatchcase(light_path, light_pattern):
+                continue
+
+            light_node = hou.node(light_path) or lights_by_name.get(light_path.rsplit("/", 1)[-1])
+            if light_node is None:
+                unmatched_lights.append(record["light"])
+                continue
+
+            attached_filter_ids = set()
+            for fetch_node in light_node.node("shopnet/arnold_vopnet").children():
+                attached_filter_ids.add(fetch_node.userData(FILTER_ID_KEY))
+            for filter_id in record["filters"]:
+                if filter_id in filter_nodes and filter_id not in attached_filter_ids:
+                    connect_fetch(light_node, filter_nodes[filter_id])
+            light_count += 1
+
+    return filter_count, light_count, unmatched_lights
+
+
+def assignment_tables(records):
+    """
+    Collect export records into tables for diffing two scene versions.
+    :param records: Iterable of filter_assignment_records or read_filter_assignments record dictionaries
+    :return: Tuple of (Dictionary {Light Filter ID: filter record}, Set of (Light path, Light Filter ID) tuples)
+    """
+
+    filters = {}
+    assignments = set()
+    for record in records:
+        if "filter" in record:
+            filters[record["id"]] = record
+        elif "light" in record:
+            for filter_id in record["filters"]:
+                assignments.add((record["light"], filter_id))
+
+    return filters, assignments
+
+
+def diff_assignment_tables(old_tables, new_tables):
+    """
+    Set difference of two assignment_tables results.
+    Light Filters of the same name and type are matched by name when either version has no stored ID for them.
+    A Light losing a Light Filter and gaining another one of the same type is reported as a retargeted Fetch.
+    Parameters missing from a filter record are at their default value, and are reported as None.
+    :param old_tables: assignment_tables of the old scene version
+    :param new_tables: assignment_tables of the new scene version
+    :return: Dictionary {"added": [...], "removed": [...], "retargeted": [...], "added_filters": [...],
+             "removed_filters": [...], "changed_filters": [...]} of JSON serializable dictionaries
+    """
+
+    old_filters, old_assignments = old_tables
+    new_filters, new_assignments = new_tables
+
+    new_ids = dict((record["filter"], filter_id) for filter_id, record in new_filters.items())
+    matched_ids = {}
+    for filter_id, record in old_filters.items():
+        new_id = new_ids.get(record["filter"])
+        if new_id is not None and new_id != filter_id and new_filters[new_id]["type"] == record["type"] and \
+                (record.get("path_id") or new_filters[new_id].get("path_id")):
+            matched_ids[filter_id] = new_id
+        else:
+            pass
+    if matched_ids:
+        old_filters = dict((matched_ids.get(filter_id, filter_id), record) for filter_id, record in old_filters.items())
+        old_assignments = set((light_path, matched_ids.get(filter_id, filter_id))
+                              for light_path, filter_id in old_assignments)
+    else:
+        pass
+
+    def filter_name(filters, filter_id):
+        return filters.get(filter_id, {}).get("filter", filter_id)
+
+    def filter_type(filters, filter_id):
+        return filters.get(filter_id, {}).get("type")
+
+    added = new_assignments - old_assignments
+    removed = old_assignments - new_assignments
+
+    added_by_type = {}
+    for light_path, filter_id in sorted(added):
+        added_by_type.setdefault((light_path, filter_type(new_filters, filter_id)), []).append(filter_id)
+
+    retargeted = []
+    for light_path, filter_id in sorted(removed):
+        new_filter_ids = added_by_type.get((light_path, filter_type(old_filters, filter_id)))
+        if new_filter_ids:
+            new_filter_id = new_filter_ids.pop(0)
+            added.discard((light_path, new_filter_id))
+            removed.discard((light_path, filter_id))
+            retargeted.append({"light": light_path, "old_filter": filter_name(old_filters, filter_id),
+                               "new_filter": filter_name(new_filters, new_filter_id)})
+
+    changed_filters = []
+    common_filter_ids = sorted(set(old_filters) & set(new_filters),
+                               key=lambda filter_id: new_filters[filter_id]["filter"])
+    for filter_id in common_filter_ids:
+        old_record = old_filters[filter_id]
+        new_record = new_filters[filter_id]
+        old_parms = dict(old_record["parms"])
+        new_parms = dict(new_record["parms"])
+        for name, value in old_record.get("blocker", {}).items():
+            old_parms["blocker:" + name] = value
+        for name, value in new_record.get("blocker", {}).items():
+            new_parms["blocker:" + name] = value
+
+        parms = {}
+        for name in set(old_parms) | set(new_parms):
+            if old_parms.get(name) != new_parms.get(name):
+                parms[name] = [old_parms.get(name), new_parms.get(name)]
+        if parms or old_record["filter"] != new_record["filter"]:
+            changed_filters.append({"filter": new_record["filter"], "old_filter": old_record["filter"],
+                                    "parms": parms})
+
+    return {"added": [{"light": light_path, "filter": filter_name(new_filters, filter_id)}
+                      for light_path, filter_id in sorted(added)],
+            "removed": [{"light": light_path, "filter": filter_name(old_filters, filter_id)}
+                        for light_path, filter_id in sorted(removed)],
+            "retargeted": retargeted,
+            "added_filters": sorted(new_filters[filter_id]["filter"]
+                                    for filter_id in set(new_filters) - set(old_filters)),
+            "removed_filters": sorted(old_filters[filter_id]["filter"]
+                                      for filter_id in set(old_filters) - set(new_filters)),
+            "changed_filters": changed_filters}
+
+
+def gobo_textures(filters_asn):
+    """
+    Texture paths of all LFM Gobo Filters, read from the Image nodes connected to their slidemap.
+    :param filters_asn: LFM_LIGHT_FILTERS_VOPNET node
+    :return: Dictionary {expanded texture path: List of Gobo Filter names}
+    """
+
+    textures = {}
+    for filter_node in filters_asn.children():
+        if filter_node.type().name() == "arnold::gobo":
+            for input_node in filter_node.inputAncestors():
+                if input_node.type().name() == "arnold::image" and input_node.parm("filename").eval():
+                    texture_path = hou.expandString(input_node.parm("filename").eval())
+                    textures.setdefault(texture_path, []).append(filter_node.name())
+
+    return textures
+
+
+def texture_files(texture_path):
+    """
+    :param texture_path: texture path, may contain <udim> style tokens
+    :return: Sorted list of existing texture files of the path
+    """
+
+    if "<" in texture_path:
+        return sorted(glob.glob(re.sub(r"<[^>]+>", "*", texture_path)))
+    if os.path.isfile(texture_path):
+        return [texture_path]
+    return []
+
+
+def texture_digest(texture_file):
+    """
+    :param texture_file: texture file path
+    :return: SHA-1 hex digest of the texture file content
+    """
+
+    digest = hashlib.sha1()
+    with open(texture_file, "rb") as texture:
+        for chunk in iter(lambda: texture.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def texture_is_mipmapped(texture_file):
+    """
+    Check whether a texture already has mipmaps: a .tx file, or a tiled OpenEXR file with mipmap or ripmap levels,
+    read from the "tiles" attribute of its header.
+    :param texture_file: texture file path
+    :return: True if the texture does not need a conversion
+    """
+
+    extension = os.path.splitext(texture_file)[1].lower()
+    if extension == ".tx":
+        return True
+    if extension != ".exr":
+        return False
+
+    def read_name(texture):
+        name = bytearray()
+        while len(name) < 256:
+            char = texture.read(1)
+            if not char or char == b"\0":
+                break
+            name += char
+        return bytes(name)
+
+    try:
+        with open(texture_file, "rb") as texture:
+            if texture.read(4) != b"\x76\x2f\x31\x01":
+                return False
+            texture.read(4)
+            while True:
+                name = read_name(texture)
+                if not name:
+                    return False
+                attribute_type = read_name(texture)
+                value = bytearray(texture.read(struct.unpack("<i", texture.read(4))[0]))
+                if name == b"tiles" and attribute_type == b"tiledesc":
+                    # level mode in the low bits of the last byte: 0 one level, 1 mipmap, 2 ripmap
+                    return len(value) == 9 and value[8] & 0x0f in (1, 2)
+    except (IOError, OSError, struct.error):
+        return False
+
+
+def convert_texture(texture_file, tx_cache, tx_command):
+    """
+    Convert a texture into a mipmapped .tx file next to it, unless the same content was converted before.
+    Runs in a worker thread, the converter itself runs as a separate process.
+    :param texture_file: texture file path
+    :param tx_cache: Dictionary {texture content digest: .tx file path}, read only
+    :param tx_command: converter command, {source} and {target} are replaced with the file paths
+    :return: Tuple of (texture file path, status, content digest, .tx file path or converter output)
+    """
+
+    if texture_is_mipmapped(texture_file):
+        return texture_file, "ready", None, texture_file
+
+    try:
+        digest = texture_digest(texture_file)
+    except (IOError, OSError) as error:
+        return texture_file, "failed", None, str(error)
+
+    tx_file = os.path.splitext(texture_file)[0] + ".tx"
+    if tx_cache.get(digest) == tx_file and os.path.isfile(tx_file):
+        return texture_file, "cached", digest, tx_file
+
+    command = [token.format(source=texture_file, target=tx_file)
+               for token in shlex.split(tx_command, posix=os.name != "nt")]
+    try:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output = process.communicate()[0]
+    except OSError as error:
+        return texture_file, "failed", digest, str(error)
+
+    if process.returncode != 0 or not os.path.isfile(tx_file):
+        return texture_file, "failed", digest, output.decode("utf-8", "replace").strip()
+
+    return texture_file, "converted", digest, tx_file
+
+
+def preflight_gobo_textures(textures, cache_path, tx_command=None, processes=None):
+    """
+    Validate Gobo textures and convert the ones which are not mipmapped, several converter processes at a time.
+    Converted textures are cached by content digest in a JSON file, so unchanged textures are not converted again.
+    An unreadable cache file is treated as empty, and written again.
+    :param textures: gobo_textures dictionary
+    :param cache_path: JSON cache file path
+    :param tx_command: converter command, defaults to ALFM_TX_COMMAND environment variable or TX_COMMAND
+    :param processes: number of converter processes running at a time, defaults to CPU count
+    :return: List of (texture path, status, detail, List of Gobo Filter names) tuples, sorted by texture path
+    """
+
+    tx_command = tx_command or os.environ.get("ALFM_TX_COMMAND") or TX_COMMAND
+
+    tx_cache = {}
+    if os.path.isfile(cache_path):
+        try:
+            with open(cache_path) as cache_file:
+                tx_cache = dict(json.load(cache_file))
+        except (IOError, TypeError, ValueError) as error:
+            sys.stderr.write("Gobo preflight cache {0} ignored: {1}\n".format(cache_path, error))
+            tx_cache = {}
+
+    results = []
+    texture_file_filters = {}
+    for texture_path, filter_names in sorted(textures.items()):
+        files = texture_files(texture_path)
+        if not files:
+            results.append((texture_path, "missing", None, filter_names))
+        for texture_file in files:
+            texture_file_filters[texture_file] = filter_names
+
+    if texture_file_filters:
+        pool = ThreadPool(processes or multiprocessing.cpu_count())
+        try:
+            conversions = pool.map(partial(convert_texture, tx_cache=tx_cache, tx_command=tx_command),
+                                   sorted(texture_file_filters))
+        finally:
+            pool.close()
+            pool.join()
+
+        for texture_file, status, digest, detail in conversions:
+            if status in ("converted", "cached"):
+                tx_cache[digest] = detail
+            results.append((texture_file, status, detail, texture_file_filters[texture_file]))
+
+        with open(cache_path, "w") as cache_file:
+            json.dump(tx_cache, cache_file, indent=1, sort_keys=True)
+
+    return sorted(results)
+
+
+def load_cost_model():
+    """
+    Default render cost model, updated with the JSON files listed in the ALFM_COST_MODEL environment variable
+    (separated by os.pathsep). Dictionaries in the files update the matching default dictionaries.
+    Files which cannot be read are skipped, and written to stderr.
+    :return: cost model dictionary
+    """
+
+    cost_model = json.loads(json.dumps(COST_MODEL))
+
+    for config_path in os.environ.get("ALFM_COST_MODEL", "").split(os.pathsep):
+        if config_path:
+            try:
+                with open(config_path) as config_file:
+                    config = json.load(config_file)
+            except (IOError, ValueError) as error:
+                sys.stderr.write("ALFM_COST_MODEL {0}: {1}\n".format(config_path, error))
+                continue
+            if not isinstance(config, dict):
+                sys.stderr.write("ALFM_COST_MODEL {0}: not a dictionary\n".format(config_path))
+                continue
+
+            for key, value in config.items():
+                if isinstance(value, dict) and isinstance(cost_model.get(key), dict):
+                    cost_model[key].update(value)
+                else:
+                    cost_model[key] = value
+
+    return cost_model
+
+
+def texture_megapixels(texture_path):
+    """
+    :param texture_path: texture path, may contain <udim> style tokens
+    :return: Megapixels of all texture files of the path, None when no texture file can be read
+    """
+
+    megapixels = None
+    for texture_file in texture_files(texture_path):
+        try:
+            width, height = hou.imageResolution(texture_file)
+        except hou.OperationFailed:
+            continue
+        if width > 0 and height > 0:
+            megapixels = (megapixels or 0.0) + width * height / 1000000.0
+
+    return megapixels
+
+
+def filter_cost(filter_node, cost_model, texture_cache):
+    """
+    Render cost of one Light Filter: base cost, cost of its type, of its Light Blocker geometry type, and of the
+    resolution of its Gobo textures.
+    :param filter_node: Light Filter node, None if it does not exist anymore
+    :param cost_model: load_cost_model dictionary
+    :param texture_cache: Dictionary {texture path: megapixels} shared between calls
+    :return: Dictionary {"cost", "type", "shape", "megapixels", "missing_textures"}
+    """
+
+    cost = {"cost": cost_model["filter"], "type": None, "shape": None, "megapixels": 0.0, "missing_textures": 0}
+    if filter_node is None:
+        return cost
+
+    cost["type"] = filter_node.type().name()
+    cost["cost"] += cost_model["types"].get(cost["type"], 0.0)
+
+    if cost["type"] == "arnold::light_blocker":
+        cost["shape"] = str(filter_node.parm("geometry_type").eval())
+        cost["cost"] += cost_model["blocker_shapes"].get(cost["shape"], 0.0)
+    elif cost["type"] == "arnold::gobo":
+        for input_node in filter_node.inputAncestors():
+            if input_node.type().name() == "arnold::image" and input_node.parm("filename").eval():
+                texture_path = hou.expandString(input_node.parm("filename").eval())
+                if texture_path not in texture_cache:
+                    texture_cache[texture_path] = texture_megapixels(texture_path)
+                if texture_cache[texture_path] is None:
+                    cost["missing_textures"] += 1
+                else:
+                    cost["megapixels"] += texture_cache[texture_path]
+        cost["cost"] += cost["megapixels"] * cost_model["gobo_megapixel"]
+        cost["cost"] += cost["missing_textures"] * cost_model["missing_texture"]
+    else:
+        pass
+
+    return cost
+
+
+def light_costs(light_index, cost_model):
+    """
+    Rank Lights by the render cost of their Light Filter stacks. Each Light Filter is costed once, however many
+    Lights fetch it.
+    :param light_index: LightFilterIndex of all Lights
+    :param cost_model: load_cost_model dictionary
+    :return: List of dictionaries {"light", "cost", "filters", "types", "blockers", "megapixels", "missing_textures"},
+             most expensive first, Lights without Light Filters are left out
+    """
+
+    filter_costs = {}
+    texture_cache = {}
+
+    light_records = []
+    for light_path, filter_ids in light_index.light_filter_items():
+        if not filter_ids:
+            continue
+
+        record = {"light": light_path, "cost": 0.0, "filters": len(filter_ids), "types": {}, "blockers": {},
+                  "megapixels": 0.0, "missing_textures": 0}
+        for filter_id in filter_ids:
+            if filter_id not in filter_costs:
+                filter_costs[filter_id] = filter_cost(light_index.filter_node(filter_id), cost_model, texture_cache)
+            cost = filter_costs[filter_id]
+
+            record["cost"] += cost["cost"]
+            if cost["type"] is not None:
+                record["types"][cost["type"]] = record["types"].get(cost["type"], 0) + 1
+            if cost["shape"] is not None:
+                record["blockers"][cost["shape"]] = record["blockers"].get(cost["shape"], 0) + 1
+            record["megapixels"] += cost["megapixels"]
+            record["missing_textures"] += cost["missing_textures"]
+        record["cost"] = round(record["cost"], 3)
+        record["megapixels"] = round(record["megapixels"], 3)
+        light_records.append(record)
+
+    light_records.sort(key=lambda record: (-record["cost"], record["light"]))
+
+    return light_records
+
+
+class ChunkedOperation(object):
+    """
+    Undo group with progress reporting and cancellation, for operations over many Lights.
+
+    Items are processed in chunks and progress is reported once per chunk. Chunk size adapts so progress is
+    reported about every PROGRESS_INTERVAL seconds, often enough for Houdini to repaint, rarely enough not to slow
+    the operation down. Cancelling from the interrupt dialog undoes everything done inside the with block.
+
+    with ChunkedOperation("LFM Attach Filters") as operation:
+        for light_path in operation.items(light_paths):
+            ...
+    if operation.cancelled:
+        ...
+    """
+
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, operation_name, chunk_size=16):
+        """
+        Init Constructor
+        :param operation_name: undo group and progress dialog name
+        :param chunk_size: number of items of the first chunk
+        """
+
+        self.operation_name = operation_name
+        self.chunk_size = chunk_size
+        self.cancelled = False
+
+        self.undo_group = None
+        self.operation = None
+
+    def __enter__(self):
+        self.undo_group = hou.undos.group(self.operation_name)
+        self.undo_group.__enter__()
+        self.operation = hou.InterruptableOperation(self.operation_name, open_interrupt_dialog=True)
+        self.operation.__enter__()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.operation.__exit__(exc_type, exc_value, traceback)
+        self.undo_group.__exit__(exc_type, exc_value, traceback)
+
+        if exc_type is not None and issubclass(exc_type, hou.OperationInterrupted):
+            hou.undos.performUndo()
+            self.cancelled = True
+            return True
+
+        return False
+
+    def items(self, items):
+        """
+        Iterate items, reporting progress after each chunk
+        :param items: Iterable of items
+        :return: Generator of items, raises hou.OperationInterrupted when cancelled
+        """
+
+        items = list(items)
+        position = 0
+        while position < len(items):
+            start_time = time.time()
+            for item in items[position:position + self.chunk_size]:
+                yield item
+            position += self.chunk_size
+
+            self.operation.updateProgress(min(position, len(items)) / float(len(items)))
+
+            elapsed = max(time.time() - start_time, 0.001)
+            self.chunk_size = max(1, min(self.chunk_size * 4, int(self.chunk_size * self.PROGRESS_INTERVAL / elapsed)))
+
+
+def display_message(message, details=None):
+    """
+    An information dialog popup.
+    :param message: text message
+    :param details: text shown in the expandable details section
+    :return: None
+    """
+    hou.ui.displayMessage(message, details=details)
+
+
+def list_filter(filter_lineedit, ui_list_widget):
+    """
+    Filter out the list widget by hiding items not matching the filter text.
+    :param filter_lineedit: line edit text to filter list widget items
+    :param ui_list_widget: list widget ui object
+    :return: None
+    """
 
-    ui_list_widget.clear()
+    filter_text = filter_lineedit.text()
 
-    if ui_list_widget:
-        for item in filter_list:
-            ui_list_widget.addItem(item)
\ No newline at end of file
+    for row in range(ui_list_widget.count()):
+        filter_item = ui_list_widget.item(row)
+        filter_item.setHidden(filter_text not in filter_item.text())
@@ -4,14 +4,15 @@ alfm_logic_py2.py
 
 This file is accessed when Python Version 2 is detected.
 
-This file contains Class ArnoldLFM.
+This file contains Class ArnoldLFM, Class FilterParmsEditor and Class RenderCostReport.
 Main Window loading and Signals and Slots for UI building.
 
 """
 
+import json
 import os
+from functools import partial
 from PySide2 import QtCore, QtUiTools
-from collections import OrderedDict
 from alfm_functions_py2 import *
 
 
@@ -31,22 +32,24 @@ class ArnoldLFM(QtWidgets.QDialog):
     This Class contains all main logical functions, and main UI.
     """
 
-    # Dictionary {Light Filter Type: [Name, Node Name]}
-    LIGHT_FILTERS = OrderedDict([("arnold::barndoor", ["Barndoor", "LFM_barndoor1"]),
-                                 ("arnold::gobo", ["Gobo", "LFM_gobo1"]),
-                                 ("arnold::light_blocker", ["Light Blocker", "LFM_light_blocker1"]),
-                                 ("arnold::light_decay", ["Light Decay", "LFM_light_decay1"])])
+    # Registry of Light Filter types, built-in Arnold Light Filters plus custom types from ALFM_FILTER_TYPES
+    FILTER_TYPES = load_filter_types()
 
     # Dictionary {Light Type Index: List of Light Filters supported by the Light Type}
-    LIGHT_TYPES = {0: [list(LIGHT_FILTERS)[2], list(LIGHT_FILTERS)[3]],
-                   1: [list(LIGHT_FILTERS)[2]],
-                   2: [list(LIGHT_FILTERS)[0], list(LIGHT_FILTERS)[1], list(LIGHT_FILTERS)[2], list(LIGHT_FILTERS)[3]],
-                   3: [list(LIGHT_FILTERS)[2], list(LIGHT_FILTERS)[3]],
-                   4: [list(LIGHT_FILTERS)[2], list(LIGHT_FILTERS)[3]],
-                   5: [list(LIGHT_FILTERS)[2], list(LIGHT_FILTERS)[3]],
-                   6: [list(LIGHT_FILTERS)[2]],
-                   7: [list(LIGHT_FILTERS)[2], list(LIGHT_FILTERS)[3]],
-                   8: [list(LIGHT_FILTERS)[2], list(LIGHT_FILTERS)[3]]}
+    LIGHT_TYPES = FILTER_TYPES.light_types
+
+    # Dictionary {Light Type Index: Light Type Name}
+    LIGHT_TYPE_NAMES = {0: "Point", 1: "Distant", 2: "Spot", 3: "Quad", 4: "Disk", 5: "Cylinder", 6: "Skydome",
+                        7: "Mesh", 8: "Photometric"}
+
+    # Light Filter facet item data of "No Filters", never a Light Filter ID
+    NO_FILTERS_FACET = "<no filters>"
+
+    # Light node events which invalidate the cached Light Type
+    LIGHT_TYPE_EVENTS = (hou.nodeEventType.ParmTupleChanged, hou.nodeEventType.BeingDeleted)
+
+    # Selections of this many Lights compute the Filters panel in a background thread
+    BACKGROUND_SELECTION_SIZE = 1000
 
     def __init__(self, ui_path=None, parent=hou_main_window()):
         """
@@ -61,11 +64,38 @@ class ArnoldLFM(QtWidgets.QDialog):
         self.resize(600, 500)
         self.setWindowFlags(self.windowFlags() ^ QtCore.Qt.WindowContextHelpButtonHint)
 
+        # {Light node session ID: Light Type index} and {Light path: Light node session ID}
+        self.light_types = {}
+        self.light_session_ids = {}
+
+        # Light Type and Light Filter indexes of all Lights, and Lights selected for the Shares Filters facet
+        self.light_index = LightFilterIndex()
+        self.facet_selection = []
+
+        # True while a Houdini selection sync is scheduled for the next event loop tick
+        self.selection_sync_pending = False
+
+        # True while an Active list reorder is scheduled for the next event loop tick
+        self.reorder_pending = False
+
+        # Background computation of the Filters panel for large selections
+        self.filter_panel_worker = FilterPanelWorker(self)
+        self.filter_panel_worker.finished.connect(self.filters_panel_ready)
+
         self.init_ui(ui_path)
         self.create_layout()
         self.create_connections()
         self.light_filters_subnet()
         self.lights_list()
+        self.load_presets()
+
+        if self.FILTER_TYPES.errors:
+            display_message("Some custom Light Filter types could not be loaded, see ALFM_FILTER_TYPES.",
+                            details="\n".join(self.FILTER_TYPES.errors))
+        else:
+            pass
+
+        hou.ui.addSelectionCallback(self.houdini_selection_changed)
 
     def init_ui(self, ui_path):
         """
@@ -95,20 +125,37 @@ class ArnoldLFM(QtWidgets.QDialog):
         main_layout.setContentsMargins(0, 0, 0, 0)
         main_layout.addWidget(self.ui)
 
+        self.light_model = LightTreeModel(self)
+        self.ui.lights_list.setModel(self.light_model)
+
     def create_connections(self):
         """
         Signals and Slots connections
         :return: None
         """
-        self.ui.lights_list.itemSelectionChanged.connect(self.filters_list)
+        self.ui.lights_list.selectionModel().selectionChanged.connect(self.filters_list)
         self.ui.available_list.itemDoubleClicked.connect(self.attach_filter_btn)
         self.ui.active_list.itemDoubleClicked.connect(self.disconnect_filter_btn)
+        self.ui.active_list.model().rowsMoved.connect(self.active_list_moved)
         self.ui.refresh_btn.clicked.connect(self.refresh_btn)
         self.ui.add_btn.clicked.connect(self.add_filter_btn)
+        self.ui.apply_preset_btn.clicked.connect(self.apply_preset_btn)
+        self.ui.export_btn.clicked.connect(self.export_btn)
+        self.ui.import_btn.clicked.connect(self.import_btn)
         self.ui.attach_filter_btn.clicked.connect(self.attach_filter_btn)
         self.ui.remove_filter_btn.clicked.connect(self.remove_filter_btn)
         self.ui.disconnect_filter_btn.clicked.connect(self.disconnect_filter_btn)
+        self.ui.edit_parms_btn.clicked.connect(self.edit_parms_btn)
+        self.ui.bake_blockers_btn.clicked.connect(self.bake_blockers_btn)
+        self.ui.merge_duplicates_btn.clicked.connect(self.merge_duplicates_btn)
+        self.ui.preflight_btn.clicked.connect(self.preflight_btn)
+        self.ui.cost_btn.clicked.connect(self.cost_btn)
+        self.ui.blocker_guides_btn.clicked.connect(self.blocker_guides_btn)
         self.ui.light_filter_line.textChanged.connect(self.light_list_filter)
+        self.ui.type_facet.currentIndexChanged.connect(self.light_list_filter)
+        self.ui.filter_facet.currentIndexChanged.connect(self.light_list_filter)
+        self.ui.share_facet_check.toggled.connect(self.share_facet_toggled)
+        self.ui.smart_add_check.toggled.connect(self.filters_list)
         self.ui.available_filter_line.textChanged.connect(self.available_list_filter)
         self.ui.active_filter_line.textChanged.connect(self.active_list_filter)
         self.ui.light_filter_clear_btn.clicked.connect(self.ui.light_filter_line.clear)
@@ -148,15 +195,223 @@ class ArnoldLFM(QtWidgets.QDialog):
 
         light_nodes = hou.objNodeTypeCategory().nodeType("arnold_light").instances()
         light_path_list = []
+        self.light_index.clear()
+        self.light_index.index_filters(self.asn, self.blocker_subnet, self.FILTER_TYPES)
         for light_node in light_nodes:
-            light_path_list.append(light_node.path())
-        self.ui.lights_list.clear()
-        for name in light_path_list:
-            light_item = QtWidgets.QListWidgetItem(name)
-            self.ui.lights_list.addItem(light_item)
+            light_path = intern_string(light_node.path())
+            light_path_list.append(light_path)
+            if light_node.sessionId() not in self.light_types:
+                self.cache_light_type(light_node)
+            self.light_index.add_light(light_path, self.light_types[light_node.sessionId()],
+                                       light_fetches(light_node, self.FILTER_TYPES, self.light_index))
+
+        self.facet_lists()
+        self.light_list_filter()
 
         return light_path_list
 
+    def selected_light_paths(self):
+        """
+        Paths of Lights selected in Lights list
+        :return: List of Light paths
+        """
+
+        return self.light_model.selected_light_paths(self.ui.lights_list.selectionModel().selection())
+
+    def index_lights(self, light_paths):
+        """
+        Update Light Filter indexes, and Light indexes and Light Filter facet list of the given Lights
+        :param light_paths: List of Light paths
+        :return: None
+        """
+
+        self.light_index.index_filters(self.asn, self.blocker_subnet, self.FILTER_TYPES)
+        for light_path in light_paths:
+            light_node = hou.node(light_path)
+            if light_node is None:
+                self.light_index.remove_light(light_path)
+            else:
+                self.light_index.add_light(light_path, self.light_type(light_path),
+                                           light_fetches(light_node, self.FILTER_TYPES, self.light_index))
+
+        self.facet_lists()
+
+    def facet_lists(self):
+        """
+        Fill Light Type and Light Filter facet drop-down lists, keeping current choices.
+        The Lights list is filtered again when the chosen Light Filter no longer exists.
+        :return: None
+        """
+
+        type_facet = self.ui.type_facet.currentData()
+        filter_facet = self.ui.filter_facet.currentData()
+
+        self.ui.type_facet.blockSignals(True)
+        self.ui.type_facet.clear()
+        self.ui.type_facet.addItem("All Types", None)
+        for light_type in sorted(self.LIGHT_TYPE_NAMES):
+            self.ui.type_facet.addItem(self.LIGHT_TYPE_NAMES[light_type], light_type)
+        self.ui.type_facet.setCurrentIndex(max(self.ui.type_facet.findData(type_facet), 0))
+        self.ui.type_facet.blockSignals(False)
+
+        self.ui.filter_facet.blockSignals(True)
+        self.ui.filter_facet.clear()
+        self.ui.filter_facet.addItem("Any Filters", None)
+        self.ui.filter_facet.addItem("No Filters", self.NO_FILTERS_FACET)
+        for filter_name, filter_id in sorted((self.light_index.filter_name(filter_id), filter_id)
+                                             for filter_id in self.light_index.filter_lights):
+            self.ui.filter_facet.addItem(filter_name, filter_id)
+        if filter_facet is not None:
+            self.ui.filter_facet.setCurrentIndex(max(self.ui.filter_facet.findData(filter_facet), 0))
+        self.ui.filter_facet.blockSignals(False)
+
+        if self.ui.filter_facet.currentData() != filter_facet:
+            self.light_list_filter()
+        else:
+            pass
+
+    def share_facet_toggled(self, checked):
+        """
+        Remember selected Lights for Shares Filters facet and filter the Lights list
+        :param checked: Shares Filters check box state
+        :return: None
+        """
+
+        if checked:
+            self.facet_selection = self.selected_light_paths()
+        else:
+            self.facet_selection = []
+
+        self.light_list_filter()
+
+    def cache_light_type(self, light_node):
+        """
+        Cache Light Type of a light and watch the light for Light Type changes
+        :param light_node: Light Object Node
+        :return: Light Type index
+        """
+
+        session_id = light_node.sessionId()
+        if session_id not in self.light_types:
+            light_node.addEventCallback(self.LIGHT_TYPE_EVENTS, self.light_type_changed)
+
+        self.light_types[session_id] = light_node.parm("ar_light_type").eval()
+        self.light_session_ids[intern_string(light_node.path())] = session_id
+
+        return self.light_types[session_id]
+
+    def light_type(self, light_path):
+        """
+        Cached Light Type of a light
+        :param light_path: Light path string
+        :return: Light Type index
+        """
+
+        session_id = self.light_session_ids.get(light_path)
+        if session_id in self.light_types:
+            return self.light_types[session_id]
+        return self.cache_light_type(hou.node(light_path))
+
+    def light_type_changed(self, event_type, node, **kwargs):
+        """
+        Light node event callback, keeps cached Light Types, Light Type index, Light Type facet and Add Filter
+        drop-down list up to date
+        :param event_type: hou.nodeEventType
+        :param node: Light Object Node
+        :return: None
+        """
+
+        session_id = node.sessionId()
+
+        if event_type == hou.nodeEventType.BeingDeleted:
+            self.light_types.pop(session_id, None)
+            self.light_session_ids.pop(node.path(), None)
+            return
+
+        parm_tuple = kwargs.get("parm_tuple")
+        if parm_tuple is not None and parm_tuple.name() != "ar_light_type":
+            return
+
+        light_type = node.parm("ar_light_type").eval()
+        if self.light_types.get(session_id) != light_type:
+            self.light_types[session_id] = light_type
+            self.light_index.set_light_type(node.path(), light_type)
+            if self.ui.type_facet.currentIndex() > 0:
+                self.light_list_filter()
+            if node.path() in self.selected_light_paths():
+                self.filters_list()
+
+    def closeEvent(self, event):
+        """
+        Remove Light node event callbacks when the window closes
+        :param event: QCloseEvent
+        :return: None
+        """
+
+        for session_id in self.light_types:
+            light_node = hou.nodeBySessionId(session_id)
+            if light_node is not None:
+                light_node.removeEventCallback(self.LIGHT_TYPE_EVENTS, self.light_type_changed)
+        self.light_types.clear()
+        self.light_session_ids.clear()
+
+        self.filter_panel_worker.cancel()
+
+        hou.ui.removeSelectionCallback(self.houdini_selection_changed)
+
+        super(ArnoldLFM, self).closeEvent(event)
+
+    def houdini_selection_changed(self, selection):
+        """
+        Houdini selection callback, coalesces selection changes into one sync per event loop tick
+        :param selection: List of selected items
+        :return: None
+        """
+
+        if self.ui.sync_selection_check.isChecked() and not self.selection_sync_pending:
+            self.selection_sync_pending = True
+            QtCore.QTimer.singleShot(0, self.sync_selection)
+
+    def sync_selection(self):
+        """
+        Select Lights and Subnets selected in Houdini in the Lights list
+        :return: None
+        """
+
+        self.selection_sync_pending = False
+
+        self.select_lights([node.path() for node in hou.selectedNodes()])
+
+    def select_lights(self, paths):
+        """
+        Select Lights and Subnets in the Lights list, keeping the current selection when none of them is listed
+        :param paths: List of Light and Subnet paths
+        :return: None
+        """
+
+        selection = self.light_model.paths_selection(paths)
+
+        if not selection.isEmpty():
+            self.ui.lights_list.selectionModel().select(
+                selection, QtCore.QItemSelectionModel.ClearAndSelect | QtCore.QItemSelectionModel.Rows)
+            self.ui.lights_list.scrollTo(selection.indexes()[0])
+
+    def load_presets(self, preset_path=None):
+        """
+        Load Light Filter presets into Presets drop-down list
+        :param preset_path: JSON presets file path
+        :return: None
+        """
+
+        if not preset_path:
+            preset_path = "{0}/alfm_presets.json".format(os.path.dirname(__file__))
+
+        self.presets = load_filter_presets(preset_path)
+
+        self.ui.presets_list.clear()
+        for preset_name in self.presets:
+            self.ui.presets_list.addItem(preset_name)
+
     def refresh_btn(self):
         """
         Refreshes List Widgets and update Lights list
@@ -174,50 +429,117 @@ class ArnoldLFM(QtWidgets.QDialog):
 
     def add_filter_btn(self):
         """
-        Add selected Arnold filters on selected lights
+        Add selected Arnold filters on selected lights, skipping lights whose Light Type does not support it
         :return: None
         """
 
-        if not self.ui.lights_list.selectedItems():
+        filter_type = self.FILTER_TYPES.by_label(self.ui.filters_list.currentText())
+
+        if not self.selected_light_paths():
             display_message("Please select at least one Light from the Lights list.")
+        elif filter_type is None:
+            display_message("Please select a Light Filter from the Add Filter list.")
         else:
-            selected_filter = self.ui.filters_list.currentText()
+            light_types = [(light_path, self.light_type(light_path)) for light_path in self.selected_light_paths()]
+            light_paths, skipped_light_paths = partition_lights(light_types, filter_type.node_type, self.LIGHT_TYPES)
+            if not light_paths:
+                display_message("{0} is not supported by the Light Type of any selected Light.".format(filter_type.label))
+                return
 
             filter_name = self.ui.filter_name_line.text()
 
-            filter_names = []
+            with ChunkedOperation("LFM Add Filter") as operation:
+                if filter_name != "":
+                    filter_node = self.asn.createNode(filter_type.node_type, "LFM_" + filter_name)
+                else:
+                    filter_node = self.asn.createNode(filter_type.node_type, filter_type.node_name)
+                filter_node.moveToGoodPosition(move_inputs=False)
+
+                if filter_type.post_create is not None:
+                    filter_type.post_create(self.blocker_subnet, filter_node.name(), filter_node)
 
-            for name in list(self.LIGHT_FILTERS.values()):
-                filter_names.append(name[0])
+                for light_path in operation.items(light_paths):
+                    connect_fetch(hou.node(light_path), filter_node)
 
-            if filter_name != "":
-                filter_node = self.asn.createNode(list(self.LIGHT_FILTERS.keys())[filter_names.index(selected_filter)],"LFM_" + filter_name)
+            if operation.cancelled:
+                self.index_lights(self.selected_light_paths())
+                return
+
+            if self.ui.filter_name_line:
+                self.ui.filter_name_line.clear()
+
+            self.index_lights(self.selected_light_paths())
+
+            if skipped_light_paths:
+                self.filters_list()
+                message = "{0} added on {1} Lights.\n{2} Lights skipped, their Light Type does not support {3}.".format(
+                    filter_node.name(), len(light_paths), len(skipped_light_paths), filter_type.label)
+                display_message(message, details="\n".join(skipped_light_paths))
             else:
-                filter_node = self.asn.createNode(list(self.LIGHT_FILTERS.keys())[filter_names.index(selected_filter)],
-                                                  list(self.LIGHT_FILTERS.values())[filter_names.index(selected_filter)][1])
-            filter_node.moveToGoodPosition(move_inputs=False)
+                add_filter_item(self.ui.active_list, self.light_index.add_filter(filter_node), filter_node.name())
 
-            if selected_filter == list(self.LIGHT_FILTERS.values())[2][0]:  # light blocker geo
-                light_blocker_geo(self.blocker_subnet, filter_node.name(), filter_node)
+    def apply_preset_btn(self):
+        """
+        Create and attach all Light Filters of selected preset on selected lights
+        :return: None
+        """
 
-            selected_lights_list = self.ui.lights_list.selectedItems()
-            selected_lights = []
+        if not self.selected_light_paths():
+            display_message("Please select at least one Light from the Lights list.")
+        elif self.ui.presets_list.currentText() not in self.presets:
+            display_message("Please select a Preset from the Presets list.")
+        else:
+            light_nodes = []
+            for light_path in self.selected_light_paths():
+                light_nodes.append(hou.node(light_path))
 
-            for light_path in selected_lights_list:
-                selected_lights.append(light_path.text())
+            apply_filter_preset(self.presets[self.ui.presets_list.currentText()], light_nodes, self.asn,
+                                self.blocker_subnet, self.FILTER_TYPES)
 
-            index = 2
-            for light in selected_lights:
-                fetch_node = hou.node(light + "/shopnet/arnold_vopnet").createNode("arnold::fetch", filter_node.name())
-                fetch_node.parm("target").set(filter_node.path())
-                while hou.node(light + "/shopnet/arnold_vopnet/OUT_light").input(index) is not None:
-                    index += 1
-                hou.node(light + "/shopnet/arnold_vopnet/OUT_light").setInput(index, fetch_node, 0)
+            self.index_lights(self.selected_light_paths())
+            self.filters_list()
 
-            self.ui.active_list.addItem(filter_node.name())
+    def export_btn(self):
+        """
+        Export all Light Filters and Light assignments into a file
+        :return: None
+        """
 
-            if self.ui.filter_name_line:
-                self.ui.filter_name_line.clear()
+        export_path = hou.ui.selectFile(title="Export Light Filters", pattern="*.lfm.gz",
+                                        chooser_mode=hou.fileChooserMode.Write)
+        if export_path:
+            export_path = hou.expandString(export_path)
+            light_nodes = hou.objNodeTypeCategory().nodeType("arnold_light").instances()
+            count = export_filter_assignments(export_path, light_nodes, self.asn, self.blocker_subnet,
+                                              self.FILTER_TYPES)
+            display_message("{0} records exported to {1}".format(count, export_path))
+
+    def import_btn(self):
+        """
+        Import Light Filters and Light assignments from a file
+        :return: None
+        """
+
+        import_path = hou.ui.selectFile(title="Import Light Filters", pattern="*.lfm.gz",
+                                        chooser_mode=hou.fileChooserMode.Read)
+        if import_path:
+            button, (light_pattern, path_map_text) = hou.ui.readMultiInput(
+                "Apply on Lights matching pattern, after replacing exported Light path prefixes\n"
+                "(Path Remap: source=target, separated by commas):", ("Lights Pattern", "Path Remap"),
+                buttons=("OK", "Cancel"), close_choice=1, initial_contents=("*", ""))
+            if button == 0:
+                try:
+                    path_map = parse_path_map(path_map_text)
+                except ValueError as error:
+                    display_message(str(error))
+                    return
+                filter_count, light_count, unmatched_lights = import_filter_assignments(
+                    hou.expandString(import_path), self.asn, self.blocker_subnet, light_pattern or "*", path_map)
+                message = "{0} Light Filters and {1} Light assignments imported.".format(filter_count, light_count)
+                if unmatched_lights:
+                    message += "\n{0} Lights not found in scene:\n".format(len(unmatched_lights)) + "\n".join(unmatched_lights[:20])
+                display_message(message)
+                self.refresh_btn()
 
     def attach_filter_btn(self):
         """
@@ -225,32 +547,36 @@ class ArnoldLFM(QtWidgets.QDialog):
         :return: None
         """
 
-        index = 2
-
-        if not self.ui.lights_list.selectedItems():
+        if not self.selected_light_paths():
             display_message("Please select at least one Light from the Lights list.")
         elif not self.ui.available_list.selectedItems():
             display_message("Please select at least one Light Filter from the Available Light Filters list.")
         else:
-            for filter_name in self.ui.available_list.selectedItems():
-                for light_path in self.ui.lights_list.selectedItems():
-                    light_node = hou.node(light_path.text())
-                    asn = light_node.node("shopnet/arnold_vopnet")
-                    filter_node = self.asn.node(filter_name.text())
-                    if asn.node(filter_name.text()) is None:
-                        fetch_node = asn.createNode("arnold::fetch", filter_node.name())
-                        fetch_node.parm("target").set(filter_node.path())
-                        while light_node.node("shopnet/arnold_vopnet/OUT_light").input(index) is not None:
-                            index += 1
-                        light_node.node("shopnet/arnold_vopnet/OUT_light").setInput(index, fetch_node, 0)
+            filter_items = self.ui.available_list.selectedItems()
+
+            attachments = []
+            for filter_item in filter_items:
+                filter_id = filter_item.data(QtCore.Qt.UserRole)
+                for light_path in self.selected_light_paths():
+                    if self.light_index.fetch_node(light_path, filter_id) is None:
+                        attachments.append((light_path, filter_id))
                     else:
                         pass
-                self.ui.active_list.addItem(filter_name.text())
-                self.ui.available_list.takeItem(self.ui.available_list.row(filter_name))
+
+            with ChunkedOperation("LFM Attach Filters") as operation:
+                for light_path, filter_id in operation.items(attachments):
+                    connect_fetch(hou.node(light_path), self.light_index.filter_node(filter_id))
+
+            if not operation.cancelled:
+                for filter_item in filter_items:
+                    add_filter_item(self.ui.active_list, filter_item.data(QtCore.Qt.UserRole), filter_item.text())
+                    self.ui.available_list.takeItem(self.ui.available_list.row(filter_item))
+
+            self.index_lights(self.selected_light_paths())
 
     def remove_filter_btn(self):
         """
-        Remove selected Arnold filters from scene
+        Remove selected Arnold filters from scene, with their Fetch nodes in all Lights
         :return: None
         """
 
@@ -258,59 +584,240 @@ class ArnoldLFM(QtWidgets.QDialog):
             display_message("Please select at least one Light Filter from the Filters list.")
         else:
             if self.ui.available_list.selectedItems():
-                for filter_name in self.ui.available_list.selectedItems():
-                    filter_node = self.asn.node(filter_name.text())
-                    if filter_node.type().name() == list(self.LIGHT_FILTERS.keys())[2]:  # "arnold::light_blocker"
-                        try:
-                            self.blocker_subnet.node(filter_node.name()).destroy()
-                            filter_node.destroy()
-                        except:
-                            filter_node.destroy()
-                    else:
-                        filter_node.destroy()
-                    self.ui.available_list.takeItem(self.ui.available_list.row(filter_name))
-            elif self.ui.active_list.selectedItems():
-                for filter_name in self.ui.active_list.selectedItems():
-                    for light_path in self.ui.lights_list.selectedItems():
-                        light_node = hou.node(light_path.text())
-                        asn = light_node.node("shopnet/arnold_vopnet")
-                        fetch_node = asn.node(filter_name.text())
-                        filter_node = hou.node(fetch_node.parm("target").eval())
-                        if filter_node is not None:
-                            if filter_node.type().name() == list(self.LIGHT_FILTERS.keys())[2]:     # "arnold::light_blocker"
-                                try:
-                                    self.blocker_subnet.node(filter_node.name()).destroy()
-                                    filter_node.destroy()
-                                except:
-                                    filter_node.destroy()
-                            else:
-                                filter_node.destroy()
-                        else:
-                            pass
-                        fetch_node.destroy()
-                        self.ui.active_list.takeItem(self.ui.active_list.row(filter_name))
+                ui_list_widget = self.ui.available_list
+            else:
+                ui_list_widget = self.ui.active_list
+            filter_items = ui_list_widget.selectedItems()
+
+            plan = filter_removal_plan([filter_item.data(QtCore.Qt.UserRole) for filter_item in filter_items],
+                                       self.light_index)
+
+            with ChunkedOperation("LFM Remove Filters") as operation:
+                removed_paths = remove_filters(plan, operation)
+
+            if not operation.cancelled:
+                for filter_item in filter_items:
+                    ui_list_widget.takeItem(ui_list_widget.row(filter_item))
+                display_message("{0} Light Filters removed, {1} Fetch nodes, {2} Light Blocker geo and "
+                                "{3} Light Filter nodes deleted.".format(len(plan["filter_ids"]), len(plan["fetches"]),
+                                                        len(plan["blockers"]), len(plan["filters"])),
+                                details="\n".join(removed_paths))
             else:
                 pass
 
+            self.index_lights(plan["lights"])
+            self.light_list_filter()
+            self.filters_list()
+
     def disconnect_filter_btn(self):
         """
         Disconnect selected Arnold filters from selected lights
         :return: None
         """
 
-        if not self.ui.lights_list.selectedItems():
+        if not self.selected_light_paths():
             display_message("Please select at least one Light from the Lights list.")
         elif not self.ui.active_list.selectedItems():
             display_message("Please select at least one Light Filter from the Active Light Filters list.")
         else:
-            for filter_name in self.ui.active_list.selectedItems():
-                for light_path in self.ui.lights_list.selectedItems():
-                    light_node = hou.node(light_path.text())
-                    asn = light_node.node("shopnet/arnold_vopnet")
-                    filter_node = asn.node(filter_name.text())
-                    filter_node.destroy()
-                    self.ui.active_list.takeItem(self.ui.active_list.row(filter_name))
-                self.ui.available_list.addItem(filter_name.text())
+            filter_items = self.ui.active_list.selectedItems()
+
+            with ChunkedOperation("LFM Disconnect Filters") as operation:
+                for light_path, filter_item in operation.items([(light_path, filter_item)
+                                                                for filter_item in filter_items
+                                                                for light_path in self.selected_light_paths()]):
+                    fetch_node = self.light_index.fetch_node(light_path, filter_item.data(QtCore.Qt.UserRole))
+                    if fetch_node is not None:
+                        fetch_node.destroy()
+
+            if not operation.cancelled:
+                for filter_item in filter_items:
+                    add_filter_item(self.ui.available_list, filter_item.data(QtCore.Qt.UserRole), filter_item.text())
+                    self.ui.active_list.takeItem(self.ui.active_list.row(filter_item))
+
+            self.index_lights(self.selected_light_paths())
+
+    def edit_parms_btn(self):
+        """
+        Open Light Filter Parameters multi-edit dialog for selected Arnold filters
+        :return: None
+        """
+
+        filter_nodes = []
+        for filter_item in self.ui.available_list.selectedItems() + self.ui.active_list.selectedItems():
+            filter_node = self.light_index.filter_node(filter_item.data(QtCore.Qt.UserRole))
+            if filter_node is not None:
+                filter_nodes.append(filter_node)
+
+        if not filter_nodes:
+            display_message("Please select at least one Light Filter from the Filters list.")
+        else:
+            self.parms_editor = FilterParmsEditor(filter_nodes, self.FILTER_TYPES, self)
+            self.parms_editor.show()
+
+    def bake_blockers_btn(self):
+        """
+        Bake or unbake Light Blocker matrices of selected Light Blocker Filters, or of all when none is selected
+        :return: None
+        """
+
+        filter_ids = []
+        for filter_item in self.ui.available_list.selectedItems() + self.ui.active_list.selectedItems():
+            filter_ids.append(filter_item.data(QtCore.Qt.UserRole))
+        if not filter_ids:
+            filter_ids = self.light_index.blocker_filter_ids()
+
+        blockers = []
+        for filter_id in filter_ids:
+            if self.light_index.filter_node(filter_id) is not None and self.light_index.blocker_node(filter_id) is not None:
+                blockers.append((self.light_index.filter_node(filter_id), self.light_index.blocker_node(filter_id)))
+
+        if not blockers:
+            display_message("There are no Light Blocker Filters to bake.")
+        else:
+            start_frame, end_frame = hou.playbar.frameRange()
+            button, frame_range = hou.ui.readMultiInput("Light Blocker transforms frame range:",
+                                                        ("Start Frame", "End Frame"),
+                                                        buttons=("Bake", "Unbake", "Cancel"), close_choice=2,
+                                                        initial_contents=(str(int(start_frame)), str(int(end_frame))))
+            if button == 0:
+                try:
+                    start_frame, end_frame = float(frame_range[0]), float(frame_range[1])
+                except ValueError:
+                    display_message("Please enter numeric Start and End Frames.")
+                else:
+                    if start_frame > end_frame:
+                        display_message("Please enter a Start Frame before or at the End Frame.")
+                        return
+                    keyframed_count, constant_count = bake_light_blockers(blockers, start_frame, end_frame)
+                    display_message("{0} Light Blockers baked: {1} keyframed and {2} constant matrix parameters.".format(
+                        len(blockers), keyframed_count, constant_count))
+            elif button == 1:
+                with hou.undos.group("LFM Unbake Light Blockers"):
+                    for blocker_node, blocker_geo in blockers:
+                        link_blocker_matrix(blocker_node, blocker_geo)
+
+    def active_list_moved(self, *args):
+        """
+        Active list rows moved by drag and drop, coalesces the moves of one drop into one reorder
+        :param args: rowsMoved signal arguments
+        :return: None
+        """
+
+        if not self.reorder_pending:
+            self.reorder_pending = True
+            QtCore.QTimer.singleShot(0, self.active_list_reordered)
+
+    def active_list_reordered(self):
+        """
+        Rewire Light Filters of all selected Lights in the order of the Active list
+        :return: None
+        """
+
+        self.reorder_pending = False
+
+        filter_ids = [self.ui.active_list.item(row).data(QtCore.Qt.UserRole)
+                      for row in range(self.ui.active_list.count())]
+        selected_light_paths = self.selected_light_paths()
+
+        if filter_ids != self.active_list and selected_light_paths:
+            reorder_light_filters([hou.node(light_path) for light_path in selected_light_paths], filter_ids)
+            self.active_list = filter_ids
+        else:
+            pass
+
+    def merge_duplicates_btn(self):
+        """
+        Merge LFM Light Filters of the same type with identical parameters into one shared Light Filter
+        :return: None
+        """
+
+        duplicate_groups = duplicate_filter_groups(light_filter_nodes(self.asn, self.FILTER_TYPES))
+
+        if not duplicate_groups:
+            display_message("There are no duplicate Light Filters to merge.")
+        else:
+            removed_paths, light_paths = merge_duplicate_filters(duplicate_groups, self.light_index)
+            self.index_lights(light_paths)
+            self.light_list_filter()
+            self.filters_list()
+            display_message("{0} groups of duplicate Light Filters merged, "
+                            "{1} nodes removed:\n".format(len(duplicate_groups), len(removed_paths)) +
+                            "\n".join(removed_paths))
+
+    def preflight_btn(self):
+        """
+        Check textures of all LFM Gobo Filters, and convert the ones which are not mipmapped into .tx files
+        :return: None
+        """
+
+        textures = gobo_textures(self.asn)
+
+        if not textures:
+            display_message("There are no Gobo Filter textures to check.")
+        else:
+            cache_path = os.path.join(hou.expandString("$HOUDINI_USER_PREF_DIR"), "alfm_tx_cache.json")
+            results = preflight_gobo_textures(textures, cache_path)
+
+            counts = {"missing": 0, "failed": 0, "ready": 0, "cached": 0, "converted": 0}
+            problems = []
+            for texture_path, status, detail, filter_names in results:
+                counts[status] += 1
+                if status in ("missing", "failed"):
+                    problems.append("{0}: {1} ({2})".format(status, texture_path, ", ".join(filter_names)))
+
+            message = "{0} Gobo textures checked, {1} converted, {2} cached, {3} already mipmapped.".format(
+                len(results), counts["converted"], counts["cached"], counts["ready"])
+            if problems:
+                message += "\n{0} problems:\n".format(len(problems)) + "\n".join(problems[:20])
+            display_message(message)
+
+    def cost_btn(self):
+        """
+        Open Render Cost ranking of all Lights by their Light Filter stacks
+        :return: None
+        """
+
+        light_records = light_costs(self.light_index, load_cost_model())
+
+        if not light_records:
+            display_message("There are no Lights with Light Filters.")
+        else:
+            self.cost_report = RenderCostReport(light_records, self)
+            self.cost_report.show()
+
+    def blocker_guides_btn(self):
+        """
+        Draw guide Light Blockers in the Scene Viewer, after converting selected Light Blocker Filters into guides
+        :return: None
+        """
+
+        blockers = []
+        for filter_item in self.ui.available_list.selectedItems() + self.ui.active_list.selectedItems():
+            filter_node = self.light_index.filter_node(filter_item.data(QtCore.Qt.UserRole))
+            blocker_geo = self.light_index.blocker_node(filter_item.data(QtCore.Qt.UserRole))
+            if filter_node is not None and blocker_geo is not None:
+                blockers.append((filter_node, blocker_geo))
+
+        if blockers:
+            message = "Replace the Light Blocker geo of {0} selected Light Blockers with viewport guides?".format(
+                len(blockers))
+            button = hou.ui.displayMessage(
+                message, buttons=("Convert", "Cancel"), close_choice=1,
+                details="Matrix expressions are replaced by their values at the current frame. "
+                        "Bake animated Light Blockers first to keep their animation.")
+            if button == 0:
+                convert_blocker_guides(blockers)
+                self.index_lights([])
+            else:
+                pass
+
+        scene_viewer = hou.ui.paneTabOfType(hou.paneTabType.SceneViewer)
+        if scene_viewer is None:
+            display_message("Please open a Scene Viewer to draw Light Blocker guides.")
+        else:
+            register_blocker_guide_state(self.asn)
+            scene_viewer.setCurrentState(BLOCKER_GUIDE_STATE)
 
     def filters_list(self):
         """
@@ -318,42 +825,51 @@ class ArnoldLFM(QtWidgets.QDialog):
         :return: None
         """
 
-        selected_lights = self.ui.lights_list.selectedItems()
+        selected_light_paths = self.selected_light_paths()
 
-        selected_light_paths = []
-        for item in selected_lights:
-            selected_light_paths.append(item.text())
+        light_type_indexes = []
+        for light_path in selected_light_paths:
+            light_type_indexes.append(self.light_type(light_path))
 
-        light_nodes = []
-        for light in selected_light_paths:
-            light_nodes.append(hou.node(light))
+        snapshot = filter_panel_snapshot(selected_light_paths, light_type_indexes, self.light_index, self.asn,
+                                         self.FILTER_TYPES, self.ui.smart_add_check.isChecked())
 
-        light_type_indexes = []
-        for light_type in light_nodes:
-            light_type_indexes.append(light_type.parm("ar_light_type").eval())
+        if len(selected_light_paths) < self.BACKGROUND_SELECTION_SIZE:
+            self.filter_panel_worker.cancel()
+            self.filters_panel_ready(self.filter_panel_worker.generation,
+                                     compute_filter_panel(snapshot, self.LIGHT_TYPES))
+        else:
+            self.filter_panel_worker.start(snapshot, self.LIGHT_TYPES)
 
-        common_filters_list = accessible_filters(light_type_indexes, self.LIGHT_TYPES)
+    def filters_panel_ready(self, generation, filter_panel):
+        """
+        Applies computed Filters panel contents, ignoring results of stale computations
+        :param generation: generation number of the computation
+        :param filter_panel: compute_filter_panel dictionary
+        :return: None
+        """
 
-        if common_filters_list is not None:
-            common_filters_list.sort()
-            self.ui.filters_list.clear()
-            for light_filter in common_filters_list:
-                if light_filter == list(self.LIGHT_FILTERS)[0]:
-                    self.ui.filters_list.addItem(self.LIGHT_FILTERS[list(self.LIGHT_FILTERS.keys())[0]][0])
-                elif light_filter == list(self.LIGHT_FILTERS)[1]:
-                    self.ui.filters_list.addItem(self.LIGHT_FILTERS[list(self.LIGHT_FILTERS.keys())[1]][0])
-                elif light_filter == list(self.LIGHT_FILTERS)[2]:
-                    self.ui.filters_list.addItem(self.LIGHT_FILTERS[list(self.LIGHT_FILTERS.keys())[2]][0])
-                else:
-                    self.ui.filters_list.addItem(self.LIGHT_FILTERS[list(self.LIGHT_FILTERS.keys())[3]][0])
+        if generation != self.filter_panel_worker.generation:
+            return
+
+        filter_labels = []
+        if filter_panel["filter_types"] is not None:
+            for light_filter in filter_panel["filter_types"]:
+                filter_labels.append(self.FILTER_TYPES.get(light_filter).label)
         else:
-            self.ui.filters_list.clear()
+            pass
 
-        self.active_list = active_list(self.ui.lights_list, self.ui.active_list, self.LIGHT_FILTERS)
+        if filter_labels != [self.ui.filters_list.itemText(row) for row in range(self.ui.filters_list.count())]:
+            self.ui.filters_list.clear()
+            self.ui.filters_list.addItems(filter_labels)
+        else:
+            pass
 
-        available_filters_list = self.asn.allSubChildren()
+        update_filter_items(self.ui.active_list, filter_panel["active"], ordered=True)
+        update_filter_items(self.ui.available_list, filter_panel["available"])
 
-        self.available_list = available_list(available_filters_list, common_filters_list, self.ui.available_list,self.ui.active_list)
+        self.active_list = [filter_id for filter_name, filter_id in filter_panel["active"]]
+        self.available_list = [filter_id for filter_name, filter_id in filter_panel["available"]]
 
         if self.ui.available_filter_line:
             self.ui.available_filter_line.clear()
@@ -366,13 +882,45 @@ class ArnoldLFM(QtWidgets.QDialog):
 
     def light_list_filter(self):
         """
-        Filters the Lights text list
+        Filters the Lights text list through Light facets and filter text.
+        The tree is only rebuilt when the listed Lights change, keeping expanded nodes and selection.
         :return: None
         """
 
-        try:
-            list_filter(self.lights_list(), self.ui.light_filter_line, self.ui.lights_list)
-        except:
+        light_paths = self.light_index.lights()
+
+        if self.ui.type_facet.currentIndex() > 0:
+            light_paths &= self.light_index.lights_of_type(self.ui.type_facet.currentData())
+
+        if self.ui.filter_facet.currentIndex() == 1:
+            light_paths &= self.light_index.unfiltered_lights
+        elif self.ui.filter_facet.currentIndex() > 1:
+            light_paths &= self.light_index.lights_with_filter(self.ui.filter_facet.currentData())
+
+        if self.ui.share_facet_check.isChecked():
+            light_paths &= self.light_index.lights_sharing_filters(self.facet_selection) | set(self.facet_selection)
+
+        filter_text = self.ui.light_filter_line.text()
+        light_paths = sorted(light_path for light_path in light_paths if filter_text in light_path)
+
+        if light_paths != self.light_model.light_paths:
+            selected_paths = [self.light_model.item(index).path
+                              for index in self.ui.lights_list.selectionModel().selectedRows()]
+            expanded_paths = [path for path, item in self.light_model.items.items() if item.fetched and
+                              self.ui.lights_list.isExpanded(self.light_model.createIndex(item.row, 0, item))]
+
+            self.light_model.set_light_paths(light_paths)
+
+            # parent paths sort before their children, so parents are expanded first
+            for path in sorted(expanded_paths):
+                index = self.light_model.path_index(path)
+                if index.isValid():
+                    self.ui.lights_list.setExpanded(index, True)
+            selection = self.light_model.paths_selection(selected_paths)
+            if not selection.isEmpty():
+                self.ui.lights_list.selectionModel().select(
+                    selection, QtCore.QItemSelectionModel.ClearAndSelect | QtCore.QItemSelectionModel.Rows)
+        else:
             pass
 
     def available_list_filter(self):
@@ -382,7 +930,7 @@ class ArnoldLFM(QtWidgets.QDialog):
         """
 
         try:
-            list_filter(self.available_list, self.ui.available_filter_line, self.ui.available_list)
+            list_filter(self.ui.available_filter_line, self.ui.available_list)
         except:
             pass
 
@@ -393,6 +941,211 @@ class ArnoldLFM(QtWidgets.QDialog):
         """
 
         try:
-            list_filter(self.active_list, self.ui.active_filter_line, self.ui.active_list)
+            list_filter(self.ui.active_filter_line, self.ui.active_list)
         except:
-            pass
\ No newline at end of file
+            pass
+
+
+class FilterParmsEditor(QtWidgets.QDialog):
+    """
+    Light Filter Parameters multi-edit dialog.
+
+    Shows one parameters table per Light Filter type, edited values are applied on all Light Filters of the type.
+    """
+
+    MIXED_VALUE = "<mixed>"
+
+    def __init__(self, filter_nodes, filter_types, parent=None):
+        """
+        Init Constructor
+        :param filter_nodes: List of Light Filter Object Nodes
+        :param filter_types: FilterRegistry of Light Filter types
+        :param parent: parent QWidget
+        """
+
+        super(FilterParmsEditor, self).__init__(parent)
+
+        self.setWindowTitle("LFM Light Filter Parameters")
+        self.resize(450, 500)
+        self.setWindowFlags(self.windowFlags() ^ QtCore.Qt.WindowContextHelpButtonHint)
+
+        # {Light Filter type: List of Light Filter Object Nodes}
+        self.filter_types = {}
+        for filter_node in filter_nodes:
+            self.filter_types.setdefault(filter_node.type().name(), []).append(filter_node)
+
+        # {Light Filter type: QTableWidget} and {Light Filter type: {parameter name: edited text}}
+        self.tables = {}
+        self.edits = {}
+
+        self.tabs = QtWidgets.QTabWidget()
+        for filter_type in sorted(self.filter_types):
+            table = QtWidgets.QTableWidget(0, 2)
+            table.setHorizontalHeaderLabels(["Parameter", "Value"])
+            table.horizontalHeader().setStretchLastSection(True)
+            table.verticalHeader().setVisible(False)
+            table.itemChanged.connect(partial(self.parm_edited, filter_type))
+            self.tables[filter_type] = table
+            type_name = filter_types.get(filter_type).label if filter_type in filter_types else filter_type
+            self.tabs.addTab(table, "{0} ({1})".format(type_name, len(self.filter_types[filter_type])))
+            self.fill_table(filter_type)
+
+        self.apply_btn = QtWidgets.QPushButton("Apply")
+        self.close_btn = QtWidgets.QPushButton("Close")
+
+        btn_layout = QtWidgets.QHBoxLayout()
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.apply_btn)
+        btn_layout.addWidget(self.close_btn)
+
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.addWidget(self.tabs)
+        main_layout.addLayout(btn_layout)
+
+        self.apply_btn.clicked.connect(self.apply_edits)
+        self.close_btn.clicked.connect(self.close)
+
+    def fill_table(self, filter_type):
+        """
+        Fill parameters table of a Light Filter type with current values
+        :param filter_type: Light Filter type name
+        :return: None
+        """
+
+        table = self.tables[filter_type]
+        parm_table = filter_parm_table(self.filter_types[filter_type])
+
+        table.blockSignals(True)
+        table.setRowCount(len(parm_table))
+        for row, (parm_name, values) in enumerate(parm_table):
+            name_item = QtWidgets.QTableWidgetItem(parm_name)
+            name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemIsEditable)
+            if values.count(values[0]) == len(values):
+                value_item = QtWidgets.QTableWidgetItem(str(values[0]))
+            else:
+                value_item = QtWidgets.QTableWidgetItem(self.MIXED_VALUE)
+            table.setItem(row, 0, name_item)
+            table.setItem(row, 1, value_item)
+        table.blockSignals(False)
+
+        self.edits[filter_type] = {}
+
+    def parm_edited(self, filter_type, item):
+        """
+        Remember an edited value until Apply
+        :param filter_type: Light Filter type name
+        :param item: edited QTableWidgetItem
+        :return: None
+        """
+
+        if item.column() == 1:
+            self.edits[filter_type][self.tables[filter_type].item(item.row(), 0).text()] = item.text()
+            font = item.font()
+            font.setBold(True)
+            item.setFont(font)
+
+    def apply_edits(self):
+        """
+        Apply edited values on all Light Filters of all types in one undo group.
+        All values are converted first, so an invalid value leaves every Light Filter unchanged.
+        :return: None
+        """
+
+        filter_parms = []
+        for filter_type in self.edits:
+            parms = {}
+            for parm_name, text in self.edits[filter_type].items():
+                value = self.filter_types[filter_type][0].parm(parm_name).eval()
+                try:
+                    parms[parm_name] = type(value)(text)
+                except ValueError:
+                    display_message("Invalid value '{0}' for {1} parameter.".format(text, parm_name))
+                    return
+            if parms:
+                filter_parms.append((self.filter_types[filter_type], parms))
+
+        apply_filter_parms(filter_parms)
+        for filter_type in list(self.edits):
+            self.fill_table(filter_type)
+
+
+class RenderCostReport(QtWidgets.QDialog):
+    """
+    Render Cost ranking of Lights by their Light Filter stacks.
+
+    Lights are listed most expensive first, double clicking a row selects the Light in the tool Lights list.
+    """
+
+    COLUMNS = ("Light", "Cost", "Filters", "Filter Types", "Light Blockers", "Gobo Megapixels", "Missing Textures")
+
+    def __init__(self, light_records, parent=None):
+        """
+        Init Constructor
+        :param light_records: light_costs list
+        :param parent: ArnoldLFM window
+        """
+
+        super(RenderCostReport, self).__init__(parent)
+
+        self.setWindowTitle("LFM Render Cost")
+        self.resize(800, 500)
+        self.setWindowFlags(self.windowFlags() ^ QtCore.Qt.WindowContextHelpButtonHint)
+
+        self.light_records = light_records
+
+        self.table = QtWidgets.QTableWidget(len(light_records), len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        for row, record in enumerate(light_records):
+            blockers = ", ".join("{0} {1}".format(shape, count) for shape, count in sorted(record["blockers"].items()))
+            types = ", ".join("{0} {1}".format(filter_type, count)
+                              for filter_type, count in sorted(record["types"].items()))
+            values = (record["light"], record["cost"], record["filters"], types, blockers, record["megapixels"],
+                      record["missing_textures"])
+            for column, value in enumerate(values):
+                item = QtWidgets.QTableWidgetItem()
+                item.setData(QtCore.Qt.DisplayRole, value)
+                self.table.setItem(row, column, item)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(1, QtCore.Qt.DescendingOrder)
+
+        self.export_btn = QtWidgets.QPushButton("Export JSON")
+        self.close_btn = QtWidgets.QPushButton("Close")
+
+        btn_layout = QtWidgets.QHBoxLayout()
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.export_btn)
+        btn_layout.addWidget(self.close_btn)
+
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.addWidget(self.table)
+        main_layout.addLayout(btn_layout)
+
+        self.table.cellDoubleClicked.connect(self.select_light)
+        self.export_btn.clicked.connect(self.export_json)
+        self.close_btn.clicked.connect(self.close)
+
+    def select_light(self, row, column):
+        """
+        Select the Light of a row in the tool Lights list
+        :param row: table row
+        :param column: table column
+        :return: None
+        """
+
+        self.parent().select_lights([self.table.item(row, 0).text()])
+
+    def export_json(self):
+        """
+        Export the ranking into a JSON file
+        :return: None
+        """
+
+        export_path = hou.ui.selectFile(title="Export Render Cost", pattern="*.json",
+                                        chooser_mode=hou.fileChooserMode.Write)
+        if export_path:
+            with open(hou.expandString(export_path), "w") as export_file:
+                json.dump(self.light_records, export_file, indent=1, sort_keys=True)
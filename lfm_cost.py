@@ -0,0 +1,45 @@
+"""
+
+lfm_cost.py
+
+Headless Render Cost ranking of the Lights of a scene by their Light Filter stacks, as JSON.
+Each Light is scored by its Light Filter count, Light Filter types, Light Blocker geometry types and Gobo texture
+resolution, with the cost model of the tool (updated with the ALFM_COST_MODEL environment variable).
+
+Usage:
+hython lfm_cost.py scene.hip
+hython lfm_cost.py scene.hip --limit 20 > costs.json
+
+"""
+
+import json
+import sys
+
+from lfm_service import SceneIndex
+
+
+def main(arguments):
+    """
+    Command line entry point
+    :param arguments: command line arguments without the script path
+    :return: exit code
+    """
+
+    scene_paths = [argument for index, argument in enumerate(arguments)
+                   if not argument.startswith("--") and (index == 0 or arguments[index - 1] != "--limit")]
+    if len(scene_paths) != 1:
+        sys.stderr.write(__doc__)
+        return 2
+
+    request = {"query": "costs"}
+    if "--limit" in arguments:
+        request["limit"] = int(arguments[arguments.index("--limit") + 1])
+
+    response = SceneIndex(scene_paths[0]).query(request)
+    sys.stdout.write(json.dumps(response["lights"], indent=1, sort_keys=True) + "\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
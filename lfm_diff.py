@@ -0,0 +1,110 @@
+"""
+
+lfm_diff.py
+
+Headless Light Filter assignment diff between two scene versions, without opening the tool.
+Each version can be a hip file or an assignment file (*.lfm.gz) exported from the tool.
+
+Reports Light Filters added to and removed from Lights, Fetch Nodes retargeted to another Light Filter of the
+same type, Light Filters created or deleted, and Light Filters whose parameters or Light Blocker transforms changed.
+
+Usage:
+hython lfm_diff.py old_scene.hip new_scene.hip
+hython lfm_diff.py old_scene.lfm.gz new_scene.hip --json
+
+"""
+
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+
+import hou
+
+if sys.version[0] == "3":
+    from alfm_functions_py3 import assignment_tables, diff_assignment_tables, filter_assignment_records, \
+        load_filter_types, read_filter_assignments
+else:
+    from alfm_functions_py2 import assignment_tables, diff_assignment_tables, filter_assignment_records, \
+        load_filter_types, read_filter_assignments
+
+LFM_SUBNET = "/obj/LFM_LIGHT_FILTERS_SUBNET"
+
+
+def scene_tables(scene_path):
+    """
+    Assignment tables of a hip file or an exported assignment file
+    :param scene_path: hip file or *.lfm.gz file path
+    :return: assignment_tables tuple
+    """
+
+    if scene_path.endswith(".gz"):
+        return assignment_tables(read_filter_assignments(scene_path))
+
+    hou.hipFile.load(scene_path, suppress_save_prompt=True, ignore_load_warnings=True)
+
+    filters_asn = hou.node(LFM_SUBNET + "/LFM_LIGHT_FILTERS_SHOPNET/LFM_LIGHT_FILTERS_VOPNET")
+    blocker_subnet = hou.node(LFM_SUBNET + "/LFM_LIGHT_BLOCKER_SUBNET")
+    if filters_asn is None:
+        return {}, set()
+
+    light_nodes = hou.objNodeTypeCategory().nodeType("arnold_light").instances()
+
+    return assignment_tables(filter_assignment_records(light_nodes, filters_asn, blocker_subnet, load_filter_types()))
+
+
+def diff_text(diff):
+    """
+    Human readable lines of a diff_assignment_tables result
+    :param diff: diff_assignment_tables dictionary
+    :return: List of lines
+    """
+
+    lines = []
+    for filter_name in diff["added_filters"]:
+        lines.append("+ filter {0}".format(filter_name))
+    for filter_name in diff["removed_filters"]:
+        lines.append("- filter {0}".format(filter_name))
+    for change in diff["changed_filters"]:
+        if change["old_filter"] != change["filter"]:
+            lines.append("* filter {0} renamed from {1}".format(change["filter"], change["old_filter"]))
+        for name in sorted(change["parms"]):
+            old_value, new_value = change["parms"][name]
+            lines.append("* filter {0} {1}: {2} -> {3}".format(change["filter"], name, old_value, new_value))
+    for assignment in diff["added"]:
+        lines.append("+ {0} {1}".format(assignment["light"], assignment["filter"]))
+    for assignment in diff["removed"]:
+        lines.append("- {0} {1}".format(assignment["light"], assignment["filter"]))
+    for assignment in diff["retargeted"]:
+        lines.append("~ {0} {1} -> {2}".format(assignment["light"], assignment["old_filter"],
+                                               assignment["new_filter"]))
+
+    return lines
+
+
+def main(arguments):
+    """
+    Command line entry point
+    :param arguments: command line arguments without the script path
+    :return: exit code, 1 when the scene versions differ
+    """
+
+    scene_paths = [argument for argument in arguments if not argument.startswith("--")]
+    if len(scene_paths) != 2:
+        sys.stderr.write(__doc__)
+        return 2
+
+    diff = diff_assignment_tables(scene_tables(scene_paths[0]), scene_tables(scene_paths[1]))
+
+    if "--json" in arguments:
+        sys.stdout.write(json.dumps(diff, indent=1, sort_keys=True) + "\n")
+    else:
+        for line in diff_text(diff):
+            sys.stdout.write(line + "\n")
+
+    return 1 if any(diff.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,648 @@
+"""
+
+lfm_fake_hou.py
+
+In-memory stand-in for the parts of the hou module used by the tool, for running the tool outside Houdini.
+Nodes, parameters, wiring, user data, event callbacks and undo groups are kept in plain Python objects.
+Nothing is cooked or rendered, dialogs answer with preset replies.
+
+Used by lfm_parity.py, install it with sys.modules["hou"] = lfm_fake_hou before importing the tool modules.
+
+"""
+
+import contextlib
+import itertools
+import tempfile
+
+
+class OperationFailed(Exception):
+    pass
+
+
+class OperationInterrupted(Exception):
+    pass
+
+
+class ObjectWasDeleted(Exception):
+    pass
+
+
+# Default parameters of the node types created by the tool
+DEFAULT_PARMS = {
+    "arnold::light_blocker": dict([("geometry_type", "box"), ("density", 1.0), ("roundness", 0.0),
+                                   ("width_edge", 0.0), ("height_edge", 0.0), ("ramp", 0.0), ("axis", "x")] +
+                                  [("geometry_matrix{0}".format(index), 1.0 if index in (1, 6, 11, 16) else 0.0)
+                                   for index in range(1, 17)]),
+    "arnold::light_decay": {"use_near_atten": 0, "use_far_atten": 0, "near_start": 0.0, "near_end": 0.0,
+                            "far_start": 0.0, "far_end": 0.0},
+    "arnold::barndoor": {"barndoor_top_left": 0.0, "barndoor_top_right": 0.0, "barndoor_bottom_left": 1.0,
+                         "barndoor_bottom_right": 1.0},
+    "arnold::gobo": {"rotate": 0.0, "offset": 0.0, "density": 0.0, "filter_mode": "blend"},
+    "arnold::fetch": {"target": ""},
+    "arnold::image": {"filename": ""},
+    "arnold_light": {"ar_light_type": 0},
+    "geo": dict([(name, 0.0) for name in ("tx", "ty", "tz", "rx", "ry", "rz")] +
+                [(name, 1.0) for name in ("sx", "sy", "sz")]),
+    "switch": {"input": 0},
+}
+
+# Node types created inside an Object level geo node are SOPs
+SOP_TYPES = ("box", "sphere", "grid", "tube", "switch", "color", "convertline", "pack", "null", "xform")
+
+_session_ids = itertools.count(1)
+_nodes = {}
+_callbacks = {}
+_created = []
+_update_mode = ["auto"]
+
+
+class nodeEventType(object):
+    ParmTupleChanged = "ParmTupleChanged"
+    BeingDeleted = "BeingDeleted"
+    NameChanged = "NameChanged"
+    ChildCreated = "ChildCreated"
+    ChildDeleted = "ChildDeleted"
+    InputRewired = "InputRewired"
+
+
+class exprLanguage(object):
+    Python = "python"
+    Hscript = "hscript"
+
+
+class updateMode(object):
+    AutoUpdate = "auto"
+    OnMouseUp = "mouseup"
+    Manual = "manual"
+
+
+class fileChooserMode(object):
+    Read = "read"
+    Write = "write"
+    ReadAndWrite = "readwrite"
+
+
+class severityType(object):
+    Message = 0
+    ImportantMessage = 1
+    Warning = 2
+    Error = 3
+
+
+class NodeType(object):
+    def __init__(self, name, category):
+        self._name = name
+        self._category = category
+
+    def name(self):
+        return self._name
+
+    def instances(self):
+        return tuple(node for node in _root.allSubChildren()
+                     if node._type_name == self._name and node._category == self._category)
+
+
+class NodeTypeCategory(object):
+    def __init__(self, name):
+        self._name = name
+
+    def name(self):
+        return self._name
+
+    def nodeType(self, name):
+        return NodeType(name, self._name)
+
+
+class Keyframe(object):
+    def __init__(self, value=None, time=None):
+        self._value = value
+        self._frame = 0.0
+        self._expression = None
+
+    def setFrame(self, frame):
+        self._frame = frame
+
+    def frame(self):
+        return self._frame
+
+    def setValue(self, value):
+        self._value = value
+
+    def value(self):
+        return self._value
+
+    def setExpression(self, expression, language=None):
+        self._expression = expression
+
+    def expression(self):
+        return self._expression
+
+    def asCode(self, brief=False, save_keys_in_frames=False, function_name=None):
+        return "hou.Keyframe({0!r}, {1!r}).setExpression({2!r})".format(self._value, self._frame, self._expression)
+
+
+class Parm(object):
+    def __init__(self, node, name, value=0):
+        self._node = node
+        self._name = name
+        self._value = value
+        self._expression = None
+        self._keyframes = []
+
+    def name(self):
+        return self._name
+
+    def node(self):
+        return self._node
+
+    def eval(self):
+        # expressions are not evaluated, expression keyframes without a value keep the last set value
+        for keyframe in self._keyframes:
+            if keyframe.value() is not None:
+                return keyframe.value()
+        return self._value
+
+    def evalAtFrame(self, frame):
+        for keyframe in self._keyframes:
+            if keyframe.frame() == frame and keyframe.value() is not None:
+                return keyframe.value()
+        return self.eval()
+
+    def unexpandedString(self):
+        return str(self._value)
+
+    def set(self, value):
+        self._value = value
+        self._expression = None
+        self._keyframes = []
+        self._node._fire(nodeEventType.ParmTupleChanged, parm_tuple=self)
+
+    def setExpression(self, expression, language=None, replace_expression=True):
+        # like hou, an expression is kept in a keyframe, created when the parameter has none
+        if not self._keyframes:
+            self._keyframes = [Keyframe()]
+        self._keyframes[0].setExpression(expression, language)
+        self._expression = expression
+
+    def expression(self):
+        if self._expression is None:
+            raise OperationFailed("Parameter has no expression: {0}".format(self._name))
+        return self._expression
+
+    def setKeyframes(self, keyframes):
+        self._keyframes = list(keyframes)
+        self._expression = None
+
+    def keyframes(self):
+        return tuple(self._keyframes)
+
+    def deleteAllKeyframes(self):
+        self._keyframes = []
+        self._expression = None
+
+    def isAtDefault(self):
+        return False
+
+
+class ParmTuple(object):
+    def __init__(self, parms):
+        self._parms = parms
+
+    def name(self):
+        return self._parms[0].name()[:-1]
+
+    def eval(self):
+        return tuple(parm.eval() for parm in self._parms)
+
+    def set(self, values):
+        for parm, value in zip(self._parms, values):
+            parm.set(value)
+
+    def __iter__(self):
+        return iter(self._parms)
+
+
+class NodeConnection(object):
+    def __init__(self, output_node, input_index):
+        self._output_node = output_node
+        self._input_index = input_index
+
+    def outputNode(self):
+        return self._output_node
+
+    def inputIndex(self):
+        return self._input_index
+
+    def inputNode(self):
+        return self._output_node._inputs[self._input_index]
+
+    def outputIndex(self):
+        return self._output_node._input_outputs[self._input_index]
+
+
+class Node(object):
+    def __init__(self, parent, type_name, name, category):
+        self._parent = parent
+        self._type_name = type_name
+        self._category = category
+        self._name = name
+        self._children = []
+        self._inputs = {}
+        self._input_outputs = {}
+        self._outputs = []
+        self._user_data = {}
+        self._session_id = next(_session_ids)
+        self._parms = dict((parm_name, Parm(self, parm_name, value))
+                           for parm_name, value in DEFAULT_PARMS.get(type_name, {}).items())
+        self._alive = True
+        _nodes[self._session_id] = self
+
+    def name(self):
+        return self._name
+
+    def setName(self, name, unique_name=False):
+        if unique_name:
+            name = self._parent._unique_name(name)
+        self._name = name
+        self._fire(nodeEventType.NameChanged)
+
+    def path(self):
+        if self._parent is None:
+            return "/"
+        if self._parent._parent is None:
+            return "/" + self._name
+        return self._parent.path() + "/" + self._name
+
+    def sessionId(self):
+        return self._session_id
+
+    def type(self):
+        return NodeType(self._type_name, self._category)
+
+    def parent(self):
+        return self._parent
+
+    def isInsideLockedHDA(self):
+        return False
+
+    def children(self):
+        return tuple(self._children)
+
+    def allSubChildren(self, top_down=True, recurse_in_locked_nodes=True):
+        nodes = []
+        for child in self._children:
+            nodes.append(child)
+            nodes.extend(child.allSubChildren())
+        return tuple(nodes)
+
+    def node(self, node_path):
+        if node_path.startswith("/"):
+            return node(node_path)
+        current = self
+        for name in node_path.split("/"):
+            if name in ("", "."):
+                continue
+            if name == "..":
+                current = current._parent
+                continue
+            for child in current._children:
+                if child._name == name:
+                    current = child
+                    break
+            else:
+                return None
+        return current
+
+    def _unique_name(self, name):
+        names = set(child._name for child in self._children)
+        stem = name.rstrip("0123456789")
+        number = 1
+        while name in names:
+            number += 1
+            name = stem + str(number)
+        return name
+
+    def createNode(self, node_type_name, node_name=None, run_init_scripts=True, load_contents=True,
+                   exact_type_name=False, force_valid_node_name=False):
+        if node_type_name == "shopnet":
+            category = "Shop"
+        elif self._type_name == "geo" and node_type_name in SOP_TYPES:
+            category = "Sop"
+        elif self._category in ("Manager", "Object") and node_type_name in ("geo", "subnet", "null"):
+            category = "Object"
+        else:
+            category = "Vop"
+
+        name = self._unique_name(node_name or node_type_name.split("::")[-1] + "1")
+        child = Node(self, node_type_name, name, category)
+        self._children.append(child)
+        _created.append(child)
+
+        if node_type_name == "arnold_vopnet":
+            child.createNode("arnold_material", "OUT_material")
+
+        return child
+
+    def destroy(self):
+        if not self._alive:
+            raise ObjectWasDeleted("Attempt to access an object that no longer exists in Houdini.")
+        for child in list(self._children):
+            child.destroy()
+        self._fire(nodeEventType.BeingDeleted)
+        for index, input_node in list(self._inputs.items()):
+            self.setInput(index, None)
+        for output_node, index in list(self._outputs):
+            output_node.setInput(index, None)
+        self._parent._children.remove(self)
+        self._alive = False
+        _nodes.pop(self._session_id, None)
+        _callbacks.pop(self._session_id, None)
+
+    def parm(self, parm_name):
+        if parm_name not in self._parms:
+            self._parms[parm_name] = Parm(self, parm_name, 0)
+        return self._parms[parm_name]
+
+    def parms(self):
+        return tuple(self._parms[parm_name] for parm_name in sorted(self._parms))
+
+    def parmTuple(self, parm_name):
+        parms = [self._parms.get(parm_name + component) for component in "xyz"]
+        return ParmTuple(parms) if all(parm is not None for parm in parms) else None
+
+    def setParms(self, parm_dict):
+        for parm_name, value in parm_dict.items():
+            self.parm(parm_name).set(value)
+
+    def setParmExpressions(self, parm_dict, language=None, replace_expressions=True):
+        for parm_name, expression in parm_dict.items():
+            self.parm(parm_name).setExpression(expression)
+
+    def input(self, index):
+        return self._inputs.get(index)
+
+    def inputs(self):
+        if not self._inputs:
+            return ()
+        return tuple(self._inputs.get(index) for index in range(max(self._inputs) + 1))
+
+    def setInput(self, input_index, item_to_become_input, output_index=0):
+        previous = self._inputs.pop(input_index, None)
+        self._input_outputs.pop(input_index, None)
+        if previous is not None:
+            previous._outputs.remove((self, input_index))
+        if item_to_become_input is not None:
+            self._inputs[input_index] = item_to_become_input
+            self._input_outputs[input_index] = output_index
+            item_to_become_input._outputs.append((self, input_index))
+        self._fire(nodeEventType.InputRewired, input_index=input_index)
+
+    def inputConnections(self):
+        return tuple(NodeConnection(self, index) for index in sorted(self._inputs))
+
+    def inputAncestors(self):
+        ancestors = []
+        stack = list(self._inputs.values())
+        while stack:
+            input_node = stack.pop()
+            if input_node not in ancestors:
+                ancestors.append(input_node)
+                stack.extend(input_node._inputs.values())
+        return tuple(ancestors)
+
+    def outputs(self):
+        return tuple(output_node for output_node, index in self._outputs)
+
+    def userData(self, name):
+        return self._user_data.get(name)
+
+    def setUserData(self, name, value):
+        self._user_data[name] = value
+
+    def destroyUserData(self, name, must_exist=False):
+        self._user_data.pop(name, None)
+
+    def userDataDict(self):
+        return dict(self._user_data)
+
+    def addEventCallback(self, event_types, callback):
+        _callbacks.setdefault(self._session_id, []).append((tuple(event_types), callback))
+
+    def removeEventCallback(self, event_types, callback):
+        _callbacks[self._session_id] = [(types, function) for types, function in _callbacks.get(self._session_id, [])
+                                        if function != callback]
+
+    def eventCallbacks(self):
+        return tuple(_callbacks.get(self._session_id, []))
+
+    def _fire(self, event_type, **kwargs):
+        for event_types, callback in list(_callbacks.get(self._session_id, [])):
+            if event_type in event_types:
+                callback(event_type=event_type, node=self, **kwargs)
+
+    def moveToGoodPosition(self, relative_to_inputs=True, move_inputs=True, move_outputs=True,
+                           move_unconnected=True):
+        pass
+
+    def layoutChildren(self, items=(), horizontal_spacing=-1.0, vertical_spacing=-1.0):
+        pass
+
+    def setDisplayFlag(self, on):
+        pass
+
+    def setRenderFlag(self, on):
+        pass
+
+    def setExpressionLanguage(self, language):
+        pass
+
+    def setSelected(self, on, clear_all_selected=False, show_asset_if_selected=False):
+        pass
+
+    def __repr__(self):
+        return "<hou.Node {0}>".format(self.path())
+
+    def __eq__(self, other):
+        return isinstance(other, Node) and other._session_id == self._session_id
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self._session_id
+
+
+class _Undos(object):
+    def __init__(self):
+        self.groups = []
+
+    @contextlib.contextmanager
+    def group(self, label):
+        start = len(_created)
+        try:
+            yield
+        finally:
+            self.groups.append((label, start))
+
+    def performUndo(self):
+        label, start = self.groups.pop()
+        for created_node in reversed(_created[start:]):
+            if created_node._alive:
+                created_node.destroy()
+        del _created[start:]
+
+    @contextlib.contextmanager
+    def disabler(self):
+        yield
+
+
+class InterruptableOperation(object):
+    def __init__(self, operation_name, long_operation_name=None, open_interrupt_dialog=False):
+        self.operation_name = operation_name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def updateProgress(self, percentage):
+        pass
+
+    def updateLongProgress(self, percentage, long_op_status=None):
+        pass
+
+
+class _UI(object):
+    def __init__(self):
+        self.messages = []
+        self.select_file_reply = ""
+        self.read_input_reply = (0, "*")
+        self.read_multi_input_reply = None
+
+    def displayMessage(self, text, buttons=("OK",), severity=severityType.Message, **kwargs):
+        self.messages.append(text)
+        return 0
+
+    def selectFile(self, start_directory=None, title=None, pattern=None, chooser_mode=None, **kwargs):
+        return self.select_file_reply
+
+    def readInput(self, message, buttons=("OK",), initial_contents="", **kwargs):
+        return self.read_input_reply
+
+    def readMultiInput(self, message, input_labels, buttons=("OK",), initial_contents=(), **kwargs):
+        if self.read_multi_input_reply is None:
+            return 0, tuple(initial_contents)
+        return self.read_multi_input_reply
+
+    def addSelectionCallback(self, callback):
+        pass
+
+    def removeSelectionCallback(self, callback):
+        pass
+
+
+class _Qt(object):
+    def mainWindow(self):
+        return None
+
+
+class _HipFile(object):
+    def load(self, file_name, suppress_save_prompt=False, ignore_load_warnings=False):
+        raise OperationFailed("hip files can not be loaded without Houdini: {0}".format(file_name))
+
+
+class _Playbar(object):
+    def __init__(self):
+        self.frame_range = (1.0, 24.0)
+
+    def frameRange(self):
+        return self.frame_range
+
+
+undos = _Undos()
+ui = _UI()
+qt = _Qt()
+hipFile = _HipFile()
+playbar = _Playbar()
+
+_root = Node(None, "root", "", "Director")
+_obj = _root.createNode("obj", "obj")
+_obj._category = "Manager"
+_selected_nodes = []
+del _created[:]
+
+
+def node(path):
+    if path in ("", "/"):
+        return _root
+    return _root.node(path.lstrip("/"))
+
+
+def nodeBySessionId(session_id):
+    return _nodes.get(session_id)
+
+
+def selectedNodes():
+    return tuple(_selected_nodes)
+
+
+def objNodeTypeCategory():
+    return NodeTypeCategory("Object")
+
+
+def updateModeSetting():
+    return _update_mode[0]
+
+
+def setUpdateMode(mode):
+    _update_mode[0] = mode
+
+
+# {image file path: (width, height)} of images readable by imageResolution
+image_resolutions = {}
+
+
+def imageResolution(image_file_name):
+    if image_file_name not in image_resolutions:
+        raise OperationFailed("Unable to read image: {0}".format(image_file_name))
+    return image_resolutions[image_file_name]
+
+
+def expandString(text):
+    return text.replace("$HOUDINI_USER_PREF_DIR", tempfile.gettempdir())
+
+
+def create_light(parent_path, light_name, light_type=0):
+    """
+    Create an Arnold Light Object with its OUT_light node, as created by HtoA
+    :param parent_path: parent Object path
+    :param light_name: Light name
+    :param light_type: ar_light_type index
+    :return: Light Object node
+    """
+
+    light_node = node(parent_path).createNode("arnold_light", light_name)
+    light_node._category = "Object"
+    light_node.parm("ar_light_type")._value = light_type
+    vopnet = light_node.createNode("shopnet", "shopnet").createNode("arnold_vopnet", "arnold_vopnet")
+    vopnet.node("OUT_material").destroy()
+    vopnet.createNode("arnold_light", "OUT_light")
+
+    return light_node
+
+
+def clear():
+    """
+    Delete all Object nodes, callbacks and replies
+    :return: None
+    """
+
+    for child in list(_obj.children()):
+        child.destroy()
+    del _created[:]
+    del undos.groups[:]
+    del _selected_nodes[:]
+    image_resolutions.clear()
+    ui.__init__()
+    _update_mode[0] = updateMode.AutoUpdate
@@ -0,0 +1,630 @@
+"""
+
+lfm_parity.py
+
+Parity and performance harness for the py2 and py3 variants of the tool.
+Runs the same scripted scenarios against alfm_logic_py2 and alfm_logic_py3 on the in-memory hou of lfm_fake_hou.py,
+each variant in its own process, and checks that both variants leave identical node graphs and widget contents.
+Step timings of both variants are listed side by side.
+
+Each variant runs on the interpreter running this script, or on the interpreter given with --py2-interpreter or
+--py3-interpreter, so the py2 variant can run on Python 2. PySide2 is needed by each interpreter, Houdini is not.
+Timings compare the code paths of the variants on the fake hou, not Houdini cook times.
+Both processes use the same PYTHONHASHSEED, so results depending on set or dictionary order are compared as well.
+
+Usage:
+python lfm_parity.py
+python lfm_parity.py --lights 2000 --scenario add --scenario remove
+python3 lfm_parity.py --py2-interpreter /usr/bin/python2.7
+python lfm_parity.py --json > parity.json
+
+Exits with 1 when the variants differ, or when a scenario expectation fails in either variant.
+
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
+VARIANTS = ("py2", "py3")
+
+# Light Types of the generated Lights, in turn: Point, Spot, Quad, Spot, Skydome
+SCENE_LIGHT_TYPES = (0, 2, 3, 2, 6)
+SCENE_SUBNET_SIZE = 50
+
+
+def build_scene(hou, light_count):
+    """
+    Create Lights, grouped in Subnets of SCENE_SUBNET_SIZE Lights
+    :param hou: hou module
+    :param light_count: number of Lights
+    :return: List of Light paths
+    """
+
+    light_paths = []
+    for index in range(light_count):
+        parent_path = "/obj"
+        if index >= SCENE_SUBNET_SIZE:
+            parent_path = "/obj/rig{0}".format(index // SCENE_SUBNET_SIZE)
+            if hou.node(parent_path) is None:
+                hou.node("/obj").createNode("subnet", parent_path.split("/")[-1])
+        light_type = SCENE_LIGHT_TYPES[index % len(SCENE_LIGHT_TYPES)]
+        light_paths.append(hou.create_light(parent_path, "light{0}".format(index), light_type).path())
+
+    return light_paths
+
+
+class Session(object):
+    """
+    One tool window on a fresh fake scene, with helpers driving it like a user would.
+    """
+
+    def __init__(self, hou, logic_module, light_count):
+        """
+        Init Constructor
+        :param hou: hou module
+        :param logic_module: alfm_logic module of the variant
+        :param light_count: number of Lights
+        """
+
+        from PySide2 import QtWidgets
+
+        hou.clear()
+        self.hou = hou
+        self.app = QtWidgets.QApplication.instance()
+        self.light_paths = build_scene(hou, light_count)
+        self.timings = []
+
+        # {text: replacement} for process specific text in messages, like temporary file paths
+        self.replacements = {}
+
+        # Failed expectations of the scenario, reported whether or not the variants agree
+        self.failures = []
+
+        start = time.time()
+        self.window = logic_module.ArnoldLFM()
+        self.timings.append(("open", time.time() - start))
+
+    def close(self):
+        self.window.close()
+        self.window.deleteLater()
+        self.settle()
+
+    def settle(self):
+        """
+        Process events until background Filters panel computations are applied
+        :return: None
+        """
+
+        deadline = time.time() + 60
+        self.app.processEvents()
+        while threading.active_count() > 1 and time.time() < deadline:
+            time.sleep(0.005)
+        self.app.processEvents()
+
+    def step(self, name, function, *args):
+        """
+        Run one timed step and let the UI settle
+        :param name: step name
+        :param function: function to run
+        :param args: function arguments
+        :return: function result
+        """
+
+        start = time.time()
+        result = function(*args)
+        self.settle()
+        self.timings.append((name, time.time() - start))
+
+        return result
+
+    def check(self, passed, message):
+        """
+        Record a failed expectation of the scenario
+        :param passed: True when the expectation holds
+        :param message: failure description
+        :return: None
+        """
+
+        if not passed:
+            self.failures.append(message)
+
+    def select_lights(self, light_paths):
+        """
+        Select Lights in the Lights list
+        :param light_paths: List of Light paths
+        :return: None
+        """
+
+        from PySide2 import QtCore
+
+        model = self.window.light_model
+        selection_model = self.window.ui.lights_list.selectionModel()
+        selection = QtCore.QItemSelection()
+        wanted = set(light_paths)
+        for index in model_indexes(model):
+            if model.data(index, QtCore.Qt.UserRole) in wanted:
+                selection.select(index, index)
+        selection_model.select(selection, selection_model.ClearAndSelect | selection_model.Rows)
+
+    def select_items(self, list_widget, names):
+        """
+        Select Light Filter items by name, clearing the selection of both Light Filter lists
+        :param list_widget: Light Filters list widget
+        :param names: Light Filter names to select
+        :return: None
+        """
+
+        self.window.ui.available_list.clearSelection()
+        self.window.ui.active_list.clearSelection()
+        for row in range(list_widget.count()):
+            list_widget.item(row).setSelected(list_widget.item(row).text() in names)
+
+    def item_names(self, list_widget):
+        return [list_widget.item(row).text() for row in range(list_widget.count())]
+
+
+def model_indexes(model, parent=None):
+    """
+    All indexes of a tree model, fetching lazily loaded children
+    :param model: item model
+    :param parent: parent index
+    :return: generator of indexes
+    """
+
+    from PySide2 import QtCore
+
+    if parent is None:
+        parent = QtCore.QModelIndex()
+    if model.canFetchMore(parent):
+        model.fetchMore(parent)
+    for row in range(model.rowCount(parent)):
+        index = model.index(row, 0, parent)
+        yield index
+        for child_index in model_indexes(model, index):
+            yield child_index
+
+
+def add_every_filter_type(session):
+    for label in [session.window.ui.filters_list.itemText(row)
+                  for row in range(session.window.ui.filters_list.count())]:
+        session.window.ui.filters_list.setCurrentText(label)
+        session.window.add_filter_btn()
+
+
+def scenario_add(session):
+    """
+    Add every Light Filter type on a mixed selection, then on a Skydome only selection
+    """
+
+    session.step("select", session.select_lights, session.light_paths[::2])
+    session.step("add", add_every_filter_type, session)
+    session.step("select_skydomes", session.select_lights, session.light_paths[4::5])
+    session.step("add_skydomes", add_every_filter_type, session)
+
+
+def scenario_attach(session):
+    """
+    Add Light Filters on some Lights, attach them to others, and disconnect one
+    """
+
+    session.step("select", session.select_lights, session.light_paths[1::5])
+    session.step("add", add_every_filter_type, session)
+    session.step("select_all", session.select_lights, session.light_paths)
+    session.step("select_available", session.select_items, session.window.ui.available_list,
+                 session.item_names(session.window.ui.available_list))
+    session.step("attach", session.window.attach_filter_btn)
+    session.step("select_active", session.select_items, session.window.ui.active_list,
+                 session.item_names(session.window.ui.active_list)[:1])
+    session.step("disconnect", session.window.disconnect_filter_btn)
+
+
+def scenario_reorder(session):
+    """
+    Reverse the Active list of a selection
+    """
+
+    session.step("select", session.select_lights, session.light_paths[1::5])
+    session.step("add", add_every_filter_type, session)
+    active_list = session.window.ui.active_list
+
+    def reverse():
+        for row in range(active_list.count()):
+            active_list.insertItem(row, active_list.takeItem(active_list.count() - 1))
+        session.window.active_list_reordered()
+
+    session.step("reorder", reverse)
+    session.step("reselect", session.select_lights, session.light_paths[1::10])
+
+
+def scenario_remove(session):
+    """
+    Remove an Available Light Filter and an Active Light Filter.
+    The Lights selection is kept, and removed Light Filters leave both Light Filter lists.
+    """
+
+    def check_removed(filter_names, light_paths):
+        listed_names = session.item_names(session.window.ui.active_list) + \
+            session.item_names(session.window.ui.available_list)
+        session.check(not set(filter_names) & set(listed_names),
+                      "Removed Light Filters {0} still listed".format(sorted(set(filter_names) & set(listed_names))))
+        session.check(session.window.selected_light_paths() == light_paths,
+                      "{0} Lights selected after Remove, {1} before".format(len(session.window.selected_light_paths()),
+                                                                           len(light_paths)))
+
+    session.step("select", session.select_lights, session.light_paths[1::5])
+    session.step("add", add_every_filter_type, session)
+    session.step("select_some", session.select_lights, session.light_paths[1::10])
+    filter_names = session.item_names(session.window.ui.active_list)[-1:]
+    light_paths = session.window.selected_light_paths()
+    session.step("select_active", session.select_items, session.window.ui.active_list, filter_names)
+    session.step("remove_active", session.window.remove_filter_btn)
+    check_removed(filter_names, light_paths)
+    session.step("select_other", session.select_lights, session.light_paths[0::5])
+    filter_names = session.item_names(session.window.ui.available_list)[:1]
+    light_paths = session.window.selected_light_paths()
+    session.step("select_available", session.select_items, session.window.ui.available_list, filter_names)
+    session.step("remove_available", session.window.remove_filter_btn)
+    check_removed(filter_names, light_paths)
+
+
+def scenario_merge(session):
+    """
+    Add the same Light Filters twice and merge the duplicates.
+    Gobos wired to different textures are not duplicates, identical Light Blockers linked to their own geo are.
+    """
+
+    session.step("select", session.select_lights, session.light_paths[1::5])
+    session.step("add", add_every_filter_type, session)
+    session.step("select_more", session.select_lights, session.light_paths[1::10])
+    session.step("add_again", add_every_filter_type, session)
+    wire_gobo_textures(session)
+    textures = gobo_textures(session)
+    session.step("merge", session.window.merge_duplicates_btn)
+
+    session.check(gobo_textures(session) == textures,
+                  "Gobo textures {0} after merge, {1} before".format(gobo_textures(session), textures))
+    blocker_names = [node.name() for node in session.window.asn.children()
+                     if node.type().name() == "arnold::light_blocker"]
+    session.check(len(blocker_names) == 1, "Light Blockers {0} left after merge".format(blocker_names))
+    gap_paths = [light_path for light_path in session.light_paths
+                 if None in session.hou.node(light_path).node("shopnet/arnold_vopnet/OUT_light").inputs()[2:]]
+    session.check(not gap_paths, "{0} Lights with Light Filter input gaps after merge".format(len(gap_paths)))
+
+
+def wire_gobo_textures(session):
+    """
+    Wire an Image node with a texture named after the Gobo into every Gobo
+    :param session: Session
+    :return: None
+    """
+
+    for gobo_node in [node for node in session.window.asn.children() if node.type().name() == "arnold::gobo"]:
+        image_node = session.window.asn.createNode("arnold::image")
+        image_node.parm("filename").set("/tex/{0}.tx".format(gobo_node.name()))
+        gobo_node.setInput(0, image_node)
+
+
+def gobo_textures(session):
+    """
+    :param session: Session
+    :return: Sorted list of (Gobo name, texture path of the Image node wired into the Gobo, None without one)
+    """
+
+    return sorted((node.name(), node.input(0).parm("filename").eval() if node.input(0) is not None else None)
+                  for node in session.window.asn.children() if node.type().name() == "arnold::gobo")
+
+
+def scenario_roundtrip(session):
+    """
+    Export all Light Filters, delete them, import them back and refresh.
+    Gobos keep the textures of their Image nodes.
+    """
+
+    session.step("select", session.select_lights, session.light_paths[::3])
+    session.step("add", add_every_filter_type, session)
+    session.step("select_spots", session.select_lights, session.light_paths[1::5])
+    session.step("add_spots", add_every_filter_type, session)
+
+    wire_gobo_textures(session)
+    textures = gobo_textures(session)
+
+    export_path = os.path.join(tempfile.mkdtemp(prefix="lfm_parity_"), "scene.lfm.gz")
+    session.hou.ui.select_file_reply = export_path
+    session.replacements[export_path] = "scene.lfm.gz"
+    session.step("export", session.window.export_btn)
+
+    def delete_filters():
+        for filter_node in session.window.asn.children() + session.window.blocker_subnet.children():
+            filter_node.destroy()
+        for light_path in session.light_paths:
+            out_light = session.hou.node(light_path).node("shopnet/arnold_vopnet/OUT_light")
+            for input_node in out_light.inputs()[2:]:
+                if input_node is not None:
+                    input_node.destroy()
+        session.window.refresh_btn()
+
+    session.step("delete", delete_filters)
+    session.step("import", session.window.import_btn)
+    session.step("facets", session.window.light_list_filter)
+
+    session.check(gobo_textures(session) == textures,
+                  "Gobo textures {0} after import, {1} before export".format(gobo_textures(session), textures))
+    session.check(not [node for node in session.window.asn.children()
+                       if node.type().name() == "arnold::image" and not node.outputs()],
+                  "Image nodes left unwired after import")
+    os.remove(export_path)
+    os.rmdir(os.path.dirname(export_path))
+
+
+def scenario_smart(session):
+    """
+    Add every Light Filter type offered for a mixed selection with Mixed Types checked, then unchecked
+    """
+
+    session.step("check", session.window.ui.smart_add_check.setChecked, True)
+    session.step("select", session.select_lights, session.light_paths[::3])
+    session.step("add", add_every_filter_type, session)
+    session.step("uncheck", session.window.ui.smart_add_check.setChecked, False)
+    session.step("add_common", add_every_filter_type, session)
+
+
+def scenario_cost(session):
+    """
+    Rank Lights by render cost, with a readable and a missing Gobo texture
+    """
+
+    session.step("select", session.select_lights, session.light_paths[1::5])
+    session.step("add", add_every_filter_type, session)
+    session.step("select_some", session.select_lights, session.light_paths[1::10])
+    session.step("add_more", add_every_filter_type, session)
+
+    # Same texture path in both variants, as it ends up in the node graph
+    texture_path = os.path.join(tempfile.gettempdir(), "lfm_parity_gobo.tx")
+    open(texture_path, "w").close()
+    session.hou.image_resolutions[texture_path] = (2048, 1024)
+    for index, gobo_node in enumerate(node for node in session.window.asn.children()
+                                      if node.type().name() == "arnold::gobo"):
+        image_node = session.window.asn.createNode("arnold::image")
+        image_node.parm("filename").set(texture_path if index == 0 else "/missing/gobo.tx")
+        gobo_node.setInput(0, image_node)
+
+    session.step("cost", session.window.cost_btn)
+    os.remove(texture_path)
+
+
+SCENARIOS = [("add", scenario_add), ("attach", scenario_attach), ("reorder", scenario_reorder),
+             ("remove", scenario_remove), ("merge", scenario_merge), ("roundtrip", scenario_roundtrip),
+             ("smart", scenario_smart), ("cost", scenario_cost)]
+
+
+def node_graph(hou, filter_id_key):
+    """
+    Node graph under /obj, with Light Filter IDs replaced by the path of their Light Filter
+    :param hou: hou module
+    :param filter_id_key: user data key of Light Filter IDs
+    :return: Tuple of (Dictionary {node path: node record}, Dictionary {Light Filter ID: Light Filter path})
+    """
+
+    nodes = hou.node("/obj").allSubChildren()
+
+    filter_paths = {}
+    for node in nodes:
+        if node.userData(filter_id_key) is not None and node.type().name() != "arnold::fetch":
+            filter_paths[node.userData(filter_id_key)] = node.path()
+
+    graph = {}
+    for node in nodes:
+        parms = {}
+        for parm in node.parms():
+            try:
+                parms[parm.name()] = ["expression", parm.expression()]
+            except hou.OperationFailed:
+                parms[parm.name()] = [keyframe.value() for keyframe in parm.keyframes()] or parm.eval()
+        user_data = {}
+        for key, value in node.userDataDict().items():
+            user_data[key] = "id:" + filter_paths.get(value, "?") if key == filter_id_key else value
+        graph[node.path()] = {"type": node.type().name(), "parms": parms, "user_data": user_data,
+                              "inputs": [input_node.path() if input_node is not None else None
+                                         for input_node in node.inputs()]}
+
+    return graph, filter_paths
+
+
+def widget_contents(session, filter_paths):
+    """
+    Contents of the tool window lists, with Light Filter IDs replaced by the path of their Light Filter
+    :param session: Session
+    :param filter_paths: Dictionary {Light Filter ID: Light Filter path}
+    :return: Dictionary {widget name: contents}
+    """
+
+    from PySide2 import QtCore
+
+    ui = session.window.ui
+
+    def list_items(list_widget):
+        items = [list_widget.item(row) for row in range(list_widget.count())]
+        return [[item.text(), "id:" + filter_paths.get(item.data(QtCore.Qt.UserRole), "?"), item.isHidden()]
+                for item in items]
+
+    def message_text(message):
+        for text, replacement in session.replacements.items():
+            message = message.replace(text, replacement)
+        return message
+
+    def combo_items(combo_box):
+        return [combo_box.itemText(row) for row in range(combo_box.count())]
+
+    model = session.window.light_model
+    lights = [[model.data(index, QtCore.Qt.DisplayRole), model.data(index, QtCore.Qt.UserRole),
+               session.window.ui.lights_list.isRowHidden(index.row(), index.parent())]
+              for index in model_indexes(model)]
+
+    cost_rows = []
+    if getattr(session.window, "cost_report", None) is not None:
+        table = session.window.cost_report.table
+        cost_rows = [[table.item(row, column).text() for column in range(table.columnCount())]
+                     for row in range(table.rowCount())]
+
+    return {"lights_list": lights,
+            "selected_lights": session.window.selected_light_paths(),
+            "filters_list": combo_items(ui.filters_list),
+            "type_facet": combo_items(ui.type_facet),
+            "filter_facet": combo_items(ui.filter_facet),
+            "active_list": list_items(ui.active_list),
+            "available_list": list_items(ui.available_list),
+            "cost_report": cost_rows,
+            "messages": [message_text(message) for message in session.hou.ui.messages]}
+
+
+def run_variant(variant, light_count, scenario_names):
+    """
+    Run scenarios on one variant, in this process
+    :param variant: "py2" or "py3"
+    :param light_count: number of Lights
+    :param scenario_names: names of scenarios to run
+    :return: Dictionary {scenario name: {"graph", "widgets", "timings"}}
+    """
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path[:0] = [ROOT_PATH, os.path.join(ROOT_PATH, "data")]
+
+    import lfm_fake_hou
+    sys.modules["hou"] = lfm_fake_hou
+
+    # Python 2 builtins used by the py2 variant, when it runs on Python 3
+    if variant == "py2" and sys.version_info[0] == 3:
+        import builtins
+        builtins.intern = sys.intern
+
+    from PySide2 import QtWidgets
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    logic_module = __import__("alfm_logic_" + variant)
+    functions_module = __import__("alfm_functions_" + variant)
+
+    results = {}
+    for scenario_name, scenario in SCENARIOS:
+        if scenario_name not in scenario_names:
+            continue
+        session = Session(lfm_fake_hou, logic_module, light_count)
+        scenario(session)
+        graph, filter_paths = node_graph(lfm_fake_hou, functions_module.FILTER_ID_KEY)
+        results[scenario_name] = {"graph": graph, "widgets": widget_contents(session, filter_paths),
+                                  "timings": session.timings, "failures": session.failures}
+        session.close()
+
+    app.processEvents()
+
+    return results
+
+
+def differences(old, new, path=""):
+    """
+    Paths of values which differ between two JSON structures
+    :param old: JSON value
+    :param new: JSON value
+    :param path: path of the values
+    :return: List of difference lines
+    """
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        lines = []
+        for key in sorted(set(old) | set(new)):
+            if key not in old or key not in new:
+                lines.append("{0}/{1}: only in {2}".format(path, key, VARIANTS[0] if key in old else VARIANTS[1]))
+            else:
+                lines.extend(differences(old[key], new[key], "{0}/{1}".format(path, key)))
+        return lines
+
+    if old != new:
+        return ["{0}: {1} != {2}".format(path, json.dumps(old)[:200], json.dumps(new)[:200])]
+
+    return []
+
+
+def main(arguments):
+    """
+    Command line entry point
+    :param arguments: command line arguments without the script path
+    :return: exit code, 1 when the variants differ
+    """
+
+    light_count = 200
+    if "--lights" in arguments:
+        light_count = int(arguments[arguments.index("--lights") + 1])
+
+    scenario_names = [arguments[index + 1] for index, argument in enumerate(arguments) if argument == "--scenario"]
+    if not scenario_names:
+        scenario_names = [scenario_name for scenario_name, scenario in SCENARIOS]
+
+    if "--variant" in arguments:
+        variant = arguments[arguments.index("--variant") + 1]
+        results = run_variant(variant, light_count, scenario_names)
+        sys.stdout.write("\n" + json.dumps(results, sort_keys=True) + "\n")
+        return 0
+
+    # {variant: interpreter running the variant}
+    interpreters = {}
+    for variant in VARIANTS:
+        option = "--{0}-interpreter".format(variant)
+        if option in arguments:
+            interpreters[variant] = arguments[arguments.index(option) + 1]
+        else:
+            interpreters[variant] = sys.executable
+
+    # Both variants get the same string hashes, so set iteration orders can be compared
+    environment = dict(os.environ, PYTHONHASHSEED="0")
+
+    variant_results = []
+    for variant in VARIANTS:
+        command = [interpreters[variant], os.path.abspath(__file__), "--variant", variant, "--lights",
+                   str(light_count)]
+        for scenario_name in scenario_names:
+            command += ["--scenario", scenario_name]
+        output = subprocess.check_output(command, env=environment, universal_newlines=True)
+        variant_results.append(json.loads(output.strip().splitlines()[-1]))
+
+    report = {}
+    for scenario_name in scenario_names:
+        old, new = variant_results[0][scenario_name], variant_results[1][scenario_name]
+        report[scenario_name] = {
+            "differences": differences({"graph": old["graph"], "widgets": old["widgets"]},
+                                       {"graph": new["graph"], "widgets": new["widgets"]}),
+            "failures": ["{0}: {1}".format(variant, failure)
+                         for variant, results in zip(VARIANTS, (old, new)) for failure in results["failures"]],
+            "nodes": len(new["graph"]),
+            "timings": [[name, old_time, new_time]
+                        for (name, old_time), (new_name, new_time) in zip(old["timings"], new["timings"])]}
+
+    if "--json" in arguments:
+        sys.stdout.write(json.dumps(report, indent=1, sort_keys=True) + "\n")
+    else:
+        for scenario_name in scenario_names:
+            scenario_report = report[scenario_name]
+            if scenario_report["failures"]:
+                status = "FAILED"
+            elif scenario_report["differences"]:
+                status = "DIFFERENT"
+            else:
+                status = "ok"
+            sys.stdout.write("{0}: {1}, {2} nodes, {3} Lights\n".format(scenario_name, status, scenario_report["nodes"],
+                                                                         light_count))
+            for line in scenario_report["failures"] + scenario_report["differences"][:20]:
+                sys.stdout.write("    " + line + "\n")
+            sys.stdout.write("    {0:<20}{1:>12}{2:>12}\n".format("step", "py2 ms", "py3 ms"))
+            for name, old_time, new_time in scenario_report["timings"]:
+                sys.stdout.write("    {0:<20}{1:>12.1f}{2:>12.1f}\n".format(name, old_time * 1000, new_time * 1000))
+
+    return 1 if any(scenario_report["differences"] or scenario_report["failures"]
+                    for scenario_report in report.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,257 @@
+"""
+
+lfm_service.py
+
+Headless Light Filter query service for hython.
+Loads a scene once, indexes Lights, Fetch Nodes and Light Filters, and answers JSON queries on a local Unix socket,
+so pipeline tools can look up Light Filter assignments without loading the scene for every question.
+
+Each connection sends one request as a JSON object on one line, and receives one JSON object line as response.
+Connections are answered one at a time, and dropped when no request arrives within QueryHandler.timeout seconds:
+{"query": "lights_for_filter", "filter": "LFM_blocker_key"}  ->  {"lights": [Light paths]}
+{"query": "filters_for_light", "light": "/obj/key_light"}    ->  {"filters": [Light Filter names]}
+{"query": "orphans"}                                          ->  {"filters": [...], "fetches": [...]}
+{"query": "counts"}                                           ->  {"lights": n, "filters": n, ...}
+{"query": "stacks"}                                           ->  {"stacks": [{"filters": [...], "lights": n}]}
+{"query": "costs", "limit": 20}                               ->  {"lights": [light_costs records]}
+{"query": "reload"}                                           ->  {"counts": {...}}, loads the scene again
+{"query": "shutdown"}                                         ->  {"shutdown": true}
+
+Usage:
+hython lfm_service.py scene.hip --socket /tmp/lfm.sock
+echo '{"query": "counts"}' | nc -U /tmp/lfm.sock
+
+"""
+
+import json
+import os
+import socket
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+
+import hou
+
+if sys.version[0] == "3":
+    import socketserver
+    from alfm_functions_py3 import LightFilterIndex, filter_node_id, filter_stacks, light_costs, light_fetches, \
+        light_filter_nodes, load_cost_model, load_filter_types
+else:
+    import SocketServer as socketserver
+    from alfm_functions_py2 import LightFilterIndex, filter_node_id, filter_stacks, light_costs, light_fetches, \
+        light_filter_nodes, load_cost_model, load_filter_types
+
+LFM_SUBNET = "/obj/LFM_LIGHT_FILTERS_SUBNET"
+
+
+class SceneIndex(object):
+    """
+    LightFilterIndex of a loaded hip file, with the JSON queries of the service.
+    """
+
+    def __init__(self, hip_path):
+        """
+        Init Constructor
+        :param hip_path: hip file path
+        """
+
+        self.hip_path = hip_path
+        self.light_index = LightFilterIndex()
+        self.filter_types = load_filter_types()
+        self.lfm_filter_ids = []
+
+        self.load()
+
+    def load(self):
+        """
+        Load the hip file and index all Lights and Light Filters
+        :return: None
+        """
+
+        hou.hipFile.load(self.hip_path, suppress_save_prompt=True, ignore_load_warnings=True)
+
+        self.light_index.clear()
+        self.lfm_filter_ids = []
+
+        filters_asn = hou.node(LFM_SUBNET + "/LFM_LIGHT_FILTERS_SHOPNET/LFM_LIGHT_FILTERS_VOPNET")
+        blocker_subnet = hou.node(LFM_SUBNET + "/LFM_LIGHT_BLOCKER_SUBNET")
+        if filters_asn is not None and blocker_subnet is not None:
+            self.light_index.index_filters(filters_asn, blocker_subnet, self.filter_types)
+            self.lfm_filter_ids = [filter_node_id(filter_node)
+                                   for filter_node in light_filter_nodes(filters_asn, self.filter_types)]
+
+        for light_node in hou.objNodeTypeCategory().nodeType("arnold_light").instances():
+            self.light_index.add_light(light_node.path(), light_node.parm("ar_light_type").eval(),
+                                       light_fetches(light_node, self.filter_types, self.light_index))
+
+    def filter_ids(self, filter_name):
+        """
+        :param filter_name: Light Filter name or ID
+        :return: List of Light Filter IDs with the name, or the ID itself
+        """
+
+        filter_names = self.light_index.filter_names()
+        if filter_name in filter_names:
+            return [filter_name]
+
+        return [filter_id for filter_id, name in filter_names.items() if name == filter_name]
+
+    def counts(self):
+        """
+        :return: Dictionary of Light, Light Filter and assignment counts
+        """
+
+        stacks = filter_stacks(self.light_index)
+
+        return {"lights": len(self.light_index.light_entries),
+                "filters": len(self.light_index.filter_ids()),
+                "lfm_filters": len(self.lfm_filter_ids),
+                "assignments": sum(len(filter_ids) for light_path, filter_ids in self.light_index.light_filter_items()),
+                "unfiltered_lights": len(self.light_index.unfiltered_lights),
+                "unique_stacks": len(stacks),
+                "stack_nodes": sum(len(filter_ids) for filter_ids, light_paths in stacks)}
+
+    def query(self, request):
+        """
+        Answer one query
+        :param request: request dictionary
+        :return: response dictionary
+        """
+
+        query = request.get("query")
+
+        if query == "lights_for_filter":
+            light_paths = set()
+            for filter_id in self.filter_ids(request.get("filter")):
+                light_paths |= self.light_index.lights_with_filter(filter_id)
+            return {"lights": sorted(light_paths)}
+
+        if query == "filters_for_light":
+            if not self.light_index.has_light(request.get("light")):
+                return {"error": "Light not found: {0}".format(request.get("light"))}
+            return {"filters": sorted(self.light_index.filter_name(filter_id)
+                                      for filter_id in self.light_index.light_filter_ids(request["light"]))}
+
+        if query == "orphans":
+            orphan_filters = [self.light_index.filter_name(filter_id) for filter_id in self.lfm_filter_ids
+                              if not self.light_index.lights_with_filter(filter_id)]
+            orphan_fetches = []
+            for light_path, filter_ids in self.light_index.light_filter_items():
+                for filter_id in filter_ids:
+                    if self.light_index.filter_node(filter_id) is None:
+                        orphan_fetches.append(self.light_index.fetch_node(light_path, filter_id).path())
+            return {"filters": sorted(orphan_filters), "fetches": sorted(orphan_fetches)}
+
+        if query == "counts":
+            return self.counts()
+
+        if query == "stacks":
+            return {"stacks": [{"filters": sorted(self.light_index.filter_name(filter_id) for filter_id in filter_ids),
+                                "lights": len(light_paths)}
+                               for filter_ids, light_paths in filter_stacks(self.light_index)]}
+
+        if query == "costs":
+            light_records = light_costs(self.light_index, load_cost_model())
+            if request.get("limit"):
+                light_records = light_records[:request["limit"]]
+            return {"lights": light_records}
+
+        if query == "reload":
+            self.load()
+            return {"counts": self.counts()}
+
+        return {"error": "Unknown query: {0}".format(query)}
+
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    """
+    Answers the JSON query line of one client connection, then closes the connection.
+    """
+
+    # seconds to wait for the request line, so an idle client does not block the server
+    timeout = 10
+
+    def handle(self):
+        try:
+            line = self.rfile.readline()
+        except socket.timeout:
+            return
+
+        if not line.strip():
+            response = {"error": "Empty request"}
+        else:
+            try:
+                request = json.loads(line.decode("utf-8"))
+            except ValueError as error:
+                response = {"error": "Invalid JSON: {0}".format(error)}
+            else:
+                if request.get("query") == "shutdown":
+                    self.server.running = False
+                    response = {"shutdown": True}
+                else:
+                    response = self.server.scene_index.query(request)
+        self.wfile.write((json.dumps(response, separators=(",", ":")) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+
+class QueryServer(socketserver.UnixStreamServer):
+    """
+    Unix socket server answering queries on one SceneIndex, one connection at a time, so hou is only used from the
+    main thread.
+    """
+
+    def __init__(self, socket_path, scene_index):
+        """
+        Init Constructor
+        :param socket_path: Unix socket file path
+        :param scene_index: SceneIndex to query
+        """
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+        socketserver.UnixStreamServer.__init__(self, socket_path, QueryHandler)
+
+        self.scene_index = scene_index
+        self.running = True
+
+    def serve(self):
+        """
+        Handle connections until a shutdown query, then remove the socket file
+        :return: None
+        """
+
+        try:
+            while self.running:
+                self.handle_request()
+        finally:
+            self.server_close()
+            os.remove(self.server_address)
+
+
+def main(arguments):
+    """
+    Command line entry point
+    :param arguments: command line arguments without the script path
+    :return: exit code
+    """
+
+    if not arguments or not hasattr(socket, "AF_UNIX"):
+        sys.stderr.write(__doc__)
+        return 2
+
+    socket_path = "/tmp/lfm.sock"
+    if "--socket" in arguments:
+        socket_path = arguments[arguments.index("--socket") + 1]
+
+    scene_index = SceneIndex(arguments[0])
+    server = QueryServer(socket_path, scene_index)
+    sys.stdout.write("Serving {0} on {1}\n".format(arguments[0], socket_path))
+    sys.stdout.flush()
+    server.serve()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))